@@ -1,5 +1,6 @@
 import os
 import json
+import uuid
 import tempfile
 import sys
 from pathlib import Path
@@ -12,6 +13,16 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.multi_agent_workflow import MultiAgentWorkflow
 from src.query_system import QuerySystem
+from src.results_store import ResultsStore
+from app.utils.st_utils import (
+    results_key,
+    build_metrics_frame,
+    search_metrics,
+    aggregate_by_source,
+    display_paginated_table,
+    display_top_metrics_chart,
+    display_value_distribution,
+)
 
 # --- Streamlit page configuration ---
 st.set_page_config(
@@ -29,6 +40,14 @@ if "results" not in st.session_state:
     st.session_state.results = None
 if "files_processed" not in st.session_state:
     st.session_state.files_processed = False
+if "session_id" not in st.session_state:
+    # Scopes this browser session's vectors to its own Pinecone namespaces
+    st.session_state.session_id = uuid.uuid4().hex
+
+# --- Persistent results store shared across sessions ---
+@st.cache_resource
+def get_results_store():
+    return ResultsStore()
 
 # --- Function to initialize API keys ---
 def init_api_keys():
@@ -49,7 +68,9 @@ def process_files(uploaded_files, openai_key, pinecone_key):
         # Initialize the multi-agent workflow
         workflow = MultiAgentWorkflow(
             openai_api_key=openai_key,
-            pinecone_api_key=pinecone_key
+            pinecone_api_key=pinecone_key,
+            results_store=get_results_store(),
+            session_id=st.session_state.session_id
         )
         
         with st.spinner("Processing files... This may take a few minutes."):
@@ -91,6 +112,32 @@ with st.sidebar:
         if submitted:
             st.success("API Keys saved!")
 
+    # Past runs can be reopened straight from the results store, without any LLM calls
+    st.title("Past Runs")
+    past_runs = get_results_store().list_runs()
+    if past_runs:
+        run_labels = {
+            run["run_id"]: f"{run['created_at'][:19].replace('T', ' ')} · {', '.join(run['files'])} ({run['metric_count']} metrics)"
+            for run in past_runs
+        }
+        selected_run = st.selectbox(
+            "Select a run",
+            options=list(run_labels),
+            format_func=run_labels.get
+        )
+        if st.button("Open Run"):
+            st.session_state.results = get_results_store().load_run(selected_run)
+            st.session_state.files_processed = True
+            st.session_state.query_system = None
+    else:
+        st.caption("No stored runs yet.")
+
+    if st.session_state.workflow is not None:
+        with st.expander("Vector Namespaces"):
+            st.caption(f"Active namespace: {st.session_state.workflow.vector_db_manager.namespace}")
+            if st.button("Refresh Namespace Report"):
+                st.dataframe(pd.DataFrame(st.session_state.workflow.vector_db_manager.namespace_report()))
+
 # --- Main application UI ---
 st.title("📊 Multi-Agent Data Extraction and Analysis")
 st.markdown(
@@ -129,15 +176,26 @@ if st.session_state.files_processed and st.session_state.results:
     
     with quant_tab:
         st.subheader("Extracted Quantitative Data")
-        st.json(results["quantitative_data"])
-        try:
-            quant_df = pd.DataFrame.from_dict(results["quantitative_data"], orient='index')
-            quant_df.index.name = 'Metric'
-            quant_df.reset_index(inplace=True)
-            st.dataframe(quant_df)
-            st.bar_chart(quant_df.set_index('Metric'))
-        except Exception as e:
-            st.info(f"Could not convert quantitative data to a chart: {e}")
+        # Built once per run and reused across reruns; widgets below only slice it
+        run_key = results_key(results)
+        quant_df = build_metrics_frame(run_key, results["quantitative_data"] or {})
+        
+        search = st.text_input("Search metrics", key="metric_search", placeholder="Filter by metric or source name")
+        filtered_df = quant_df.iloc[search_metrics(run_key, search, quant_df)] if search.strip() else quant_df
+        display_paginated_table(filtered_df, key="metrics")
+        
+        top_n = st.slider("Metrics to chart", min_value=5, max_value=100, value=25, step=5)
+        display_top_metrics_chart(filtered_df, top_n=top_n)
+        
+        source_summary = aggregate_by_source(run_key, quant_df)
+        if len(source_summary) > 1:
+            st.subheader("Metrics by Source")
+            st.dataframe(source_summary, use_container_width=True, hide_index=True)
+            st.bar_chart(source_summary.head(top_n).set_index('Source')['Count'])
+        display_value_distribution(filtered_df)
+        
+        if st.checkbox("Show raw JSON"):
+            st.json(results["quantitative_data"], expanded=False)
     
     with qual_tab:
         st.subheader("Extracted Qualitative Data")
@@ -154,8 +212,10 @@ if st.session_state.files_processed and st.session_state.results:
     with query_tab:
         st.subheader("Ask Questions About Your Data")
         st.write("Use the query system below to ask questions about the processed documents.")
+        if st.session_state.query_system is None:
+            st.info("Querying is only available for files processed in this session.")
         query = st.text_input("Enter your question:")
-        if query and st.button("Ask Question"):
+        if query and st.session_state.query_system is not None and st.button("Ask Question"):
             with st.spinner("Generating answer..."):
                 agent = st.session_state.query_system.create_interactive_agent()
                 answer = agent.invoke({"input": query})
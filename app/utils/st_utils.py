@@ -1,19 +1,157 @@
 """
 Utility functions for the Streamlit app
 """
+import json
+import hashlib
+
 import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+
+from src.data_extractor import DataExtractor
+
+def results_key(results: Dict[str, Any]) -> str:
+    """
+    Stable cache key for a set of results
+    
+    Args:
+        results: Workflow results (live or loaded from the results store)
+    """
+    if results.get("run_id"):
+        return results["run_id"]
+    payload = json.dumps(results.get("quantitative_data") or {}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def build_metrics_frame(run_key: str, _quantitative_data: Dict[str, Any]) -> pd.DataFrame:
+    """
+    Builds the metrics DataFrame once per run (memoized on run_key)
+    
+    The frame is shared across reruns and sessions without being copied, so callers
+    must treat it as read-only.
+    
+    Args:
+        run_key: Cache key of the run, see results_key
+        _quantitative_data: Quantitative data dictionary (not hashed)
+    """
+    rows = DataExtractor.flatten_quantitative_data(_quantitative_data)
+    df = pd.DataFrame(rows, columns=['Source', 'Metric', 'Value'])
+    df['Value'] = df['Value'].map(lambda v: v if isinstance(v, str) else json.dumps(v))
+    df['Numeric'] = pd.to_numeric(df['Value'].str.replace(',', '', regex=False), errors='coerce')
+    df['Source'] = df['Source'].replace('', '(ungrouped)')
+    # Lower-cased search text, computed once so filtering is a single vectorized scan
+    df['_search'] = (df['Source'] + ' ' + df['Metric']).str.lower()
+    return df
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def search_metrics(run_key: str, query: str, _df: pd.DataFrame) -> np.ndarray:
+    """
+    Finds metrics whose source or name contains the query (memoized per run and query)
+    
+    Returns row positions rather than a DataFrame so a cache hit only copies the matches' indices.
+    
+    Args:
+        run_key: Cache key of the run
+        query: Case-insensitive search text
+        _df: Metrics DataFrame from build_metrics_frame (not hashed)
+    """
+    return np.flatnonzero(_df['_search'].str.contains(query.strip().lower(), regex=False).to_numpy())
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def aggregate_by_source(run_key: str, _df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Aggregates numeric metrics per source (memoized per run)
+    
+    Args:
+        run_key: Cache key of the run
+        _df: Metrics DataFrame from build_metrics_frame (not hashed)
+    """
+    numeric = _df.dropna(subset=['Numeric'])
+    return (
+        numeric.groupby('Source')['Numeric']
+        .agg(Count='count', Total='sum', Mean='mean')
+        .reset_index()
+        .sort_values('Count', ascending=False)
+    )
+
+def display_paginated_table(df: pd.DataFrame, key: str, page_size: int = 50):
+    """
+    Displays one page of a DataFrame so render cost is independent of its length
+    
+    Args:
+        df: DataFrame to display
+        key: Unique widget key prefix
+        page_size: Rows per page
+    """
+    pages = max(1, (len(df) + page_size - 1) // page_size)
+    page_key = f"{key}_page"
+    # Seeded here rather than via value=, which Streamlit warns about when combined with
+    # session state; a narrower search can also leave the remembered page past the end
+    if st.session_state.get(page_key, pages + 1) > pages:
+        st.session_state[page_key] = 1
+    page = st.number_input(
+        f"Page (1-{pages})", min_value=1, max_value=pages, step=1, key=page_key
+    )
+    start = (min(int(page), pages) - 1) * page_size
+    st.dataframe(
+        df.iloc[start:start + page_size][['Source', 'Metric', 'Value']],
+        use_container_width=True,
+        hide_index=True,
+    )
+    st.caption(f"Showing {min(start + 1, len(df))}-{min(start + page_size, len(df))} of {len(df)} metrics")
+
+def display_top_metrics_chart(df: pd.DataFrame, top_n: int = 25):
+    """
+    Bar chart of the top-N numeric metrics by absolute value
+    
+    Args:
+        df: Metrics DataFrame from build_metrics_frame
+        top_n: Maximum number of bars
+    """
+    numeric_df = df.dropna(subset=['Numeric'])
+    if len(numeric_df) == 0:
+        st.info("No numeric data available for visualization")
+        return
+    top = numeric_df.loc[numeric_df['Numeric'].abs().nlargest(top_n).index]
+    fig = px.bar(
+        top,
+        x='Metric',
+        y='Numeric',
+        color='Source',
+        title=f'Top {len(top)} of {len(numeric_df)} Numeric Metrics',
+        labels={'Numeric': 'Value', 'Metric': 'Metric'}
+    )
+    fig.update_layout(xaxis_tickangle=-45)
+    st.plotly_chart(fig, use_container_width=True)
+
+def display_value_distribution(df: pd.DataFrame, max_points: int = 2000, bins: int = 50):
+    """
+    Histogram of numeric values, downsampled to a fixed number of points
+    
+    Args:
+        df: Metrics DataFrame from build_metrics_frame
+        max_points: Maximum values sent to the browser
+        bins: Number of histogram bins
+    """
+    values = df['Numeric'].dropna()
+    if len(values) < 2:
+        return
+    if len(values) > max_points:
+        values = values.sample(max_points, random_state=0)
+    fig = px.histogram(values, nbins=bins, title='Distribution of Numeric Values')
+    fig.update_layout(showlegend=False, xaxis_title='Value', yaxis_title='Metrics')
+    st.plotly_chart(fig, use_container_width=True)
 
-def display_quantitative_data_chart(data: Dict[str, Any]):
+def display_quantitative_data_chart(data: Dict[str, Any], top_n: Optional[int] = 50):
     """
     Creates visualizations for quantitative data
     
     Args:
         data: Dictionary of quantitative data
+        top_n: Maximum number of bars (largest absolute values); None for all
     """
     # Convert to dataframe
     df = pd.DataFrame.from_dict(data, orient='index', columns=['Value'])
@@ -22,6 +160,8 @@ def display_quantitative_data_chart(data: Dict[str, Any]):
     
     # Filter only numeric values
     numeric_df = df[pd.to_numeric(df['Value'], errors='coerce').notna()]
+    if top_n is not None and len(numeric_df) > top_n:
+        numeric_df = numeric_df.loc[pd.to_numeric(numeric_df['Value']).abs().nlargest(top_n).index]
     
     if len(numeric_df) > 0:
         # Create bar chart with Plotly
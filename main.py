@@ -4,6 +4,7 @@ import dotenv
 
 from src.multi_agent_workflow import MultiAgentWorkflow
 from src.query_system import QuerySystem
+from src.results_store import ResultsStore
 
 def main():
     # Load environment variables
@@ -20,7 +21,8 @@ def main():
     # Initialize the workflow
     workflow = MultiAgentWorkflow(
         openai_api_key=OPENAI_API_KEY,
-        pinecone_api_key=PINECONE_API_KEY
+        pinecone_api_key=PINECONE_API_KEY,
+        results_store=ResultsStore()
     )
     
     # List of files to process
@@ -35,6 +37,9 @@ def main():
     
     # Print the results
     if results["status"] == "success":
+        if results.get("run_id"):
+            print(f"\nRun saved as {results['run_id']}")
+
         print("\n=== QUANTITATIVE DATA ===")
         print(json.dumps(results["quantitative_data"], indent=2))
         
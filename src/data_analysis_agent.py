@@ -1,51 +1,215 @@
+import re
 import json
-from typing import Dict, Any
+from typing import Dict, List, Any, Optional, Tuple
 
 # from langchain_community.chat_models import ChatOpenAI
 from langchain_openai import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate
 from langchain_core.messages import HumanMessage, SystemMessage
 
+from src.data_extractor import DataExtractor
+
+ANALYSIS_SYSTEM_PROMPT = "You are a data analysis expert. Analyze the provided quantitative and qualitative data to generate insights. Look for patterns, relationships, and key findings. Provide a comprehensive analysis in a structured JSON format with sections for 'key_findings', 'trends', 'implications', and 'recommendations'."
+PARTIAL_ANALYSIS_SYSTEM_PROMPT = "You are a data analysis expert. You are given one slice of a larger dataset, grouped by source or topic. Analyze only this slice and respond with compact JSON with sections for 'key_findings', 'trends', 'implications', and 'recommendations'. Reference the group names you draw on."
+SYNTHESIS_SYSTEM_PROMPT = "You are a data analysis expert. You are given partial analyses, each covering a different slice of the same dataset. Merge them into one comprehensive analysis: deduplicate, reconcile conflicts, and surface cross-group patterns. Respond in a structured JSON format with sections for 'key_findings', 'trends', 'implications', and 'recommendations'."
+
+
+def compact_json(data: Any) -> str:
+    """Serialize without indentation or padding; whitespace is paid for in tokens."""
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+
 class DataAnalysisAgent:
     """Agent responsible for analyzing and interpreting the extracted data."""
-    
-    def __init__(self, llm=None):
+
+    def __init__(self, llm=None, token_budget: int = 8000, max_concurrency: int = 4, analysis_mode: str = "auto"):
         self.llm = llm or ChatOpenAI(model_name="gpt-4-turbo", temperature=0)
-    
-    def analyze_data(self, quantitative_data: Dict[str, Any], qualitative_data: Dict[str, str]) -> Dict[str, Any]:
-        """Analyze and interpret the combination of quantitative and qualitative data."""
-        # Convert data to strings for the prompt
-        quant_str = json.dumps(quantitative_data, indent=2)
-        qual_str = json.dumps(qualitative_data, indent=2)
-        
+        # Maximum estimated prompt tokens of data sent in any single analysis call
+        self.token_budget = token_budget
+        self.max_concurrency = max_concurrency
+        # "single" (one prompt), "hierarchical" (group, analyze concurrently, synthesize) or "auto"
+        self.analysis_mode = analysis_mode
+        self._encoding = None
+
+    def _count_tokens(self, text: str) -> int:
+        """Estimate prompt tokens, using tiktoken when its encoding is available."""
+        if self._encoding is None:
+            try:
+                import tiktoken
+                self._encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception:
+                self._encoding = False
+        if self._encoding:
+            return len(self._encoding.encode(text))
+        return len(text) // 4 + 1
+
+    def _invoke_json(self, system_prompt: str, content: str) -> Dict[str, Any]:
         prompt = ChatPromptTemplate.from_messages([
-            SystemMessage(content="You are a data analysis expert. Analyze the provided quantitative and qualitative data to generate insights. Look for patterns, relationships, and key findings. Provide a comprehensive analysis in a structured JSON format with sections for 'key_findings', 'trends', 'implications', and 'recommendations'."),
-            HumanMessage(content=f"Analyze the following data:\n\nQuantitative Data:\n{quant_str}\n\nQualitative Data:\n{qual_str}")
+            SystemMessage(content=system_prompt),
+            HumanMessage(content=content)
         ])
-        
-        # response = self.llm.invoke(prompt)
-        formatted = prompt.format_messages()  # ✅ creates list[BaseMessage]
-        response = self.llm.invoke(formatted)
+        response = self.llm.invoke(prompt.format_messages())
+        return self._parse_response(response.content)
 
+    @staticmethod
+    def _parse_response(content: str) -> Dict[str, Any]:
+        match = re.search(r"^```(?:json)?\s*([\s\S]+?)\s*```$", content.strip(), re.IGNORECASE)
         try:
-            # Parse the analysis as JSON
-            analysis = json.loads(response.content)
-            return analysis
+            return json.loads(match.group(1) if match else content)
         except json.JSONDecodeError:
-            # Return raw text if not valid JSON
-            return {"raw_analysis": response.content}
-    
+            return {"raw_analysis": content}
+
+    def analyze_data(
+        self,
+        quantitative_data: Dict[str, Any],
+        qualitative_data: Dict[str, str],
+        mode: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Analyze and interpret the combination of quantitative and qualitative data."""
+        mode = mode or self.analysis_mode
+        # Convert data to compact strings for the prompt
+        quant_str = compact_json(quantitative_data)
+        qual_str = compact_json(qualitative_data)
+
+        if mode == "hierarchical" or (
+            mode == "auto" and self._count_tokens(quant_str) + self._count_tokens(qual_str) > self.token_budget
+        ):
+            return self.analyze_data_hierarchical(quantitative_data, qualitative_data)
+
+        return self._invoke_json(
+            ANALYSIS_SYSTEM_PROMPT,
+            f"Analyze the following data:\n\nQuantitative Data:\n{quant_str}\n\nQualitative Data:\n{qual_str}"
+        )
+
+    @staticmethod
+    def group_data(quantitative_data: Dict[str, Any], qualitative_data: Dict[str, str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Group extracted data by source/topic.
+
+        Nested quantitative groups keep their top-level key; flat metrics are grouped
+        by the first word of their name (e.g. "revenue_2023" and "revenue growth" both
+        land in "revenue"). Each qualitative category is its own group.
+        """
+        groups: Dict[str, Dict[str, Any]] = {}
+        for source, name, value in DataExtractor.flatten_quantitative_data(quantitative_data):
+            topic = source or re.split(r"[\s_.\-:/]+", name.strip().lower(), maxsplit=1)[0] or "other"
+            groups.setdefault(f"metrics:{topic}", {})[name] = value
+        for category, description in (qualitative_data or {}).items():
+            groups[f"insights:{category}"] = {category: description}
+        return groups
+
+    def _pack(self, items: List[Tuple[str, Any]], budget: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Greedily pack (key, value) items into batches whose serialized size fits the token budget."""
+        budget = self.token_budget if budget is None else budget
+        batches: List[Dict[str, Any]] = []
+        current: Dict[str, Any] = {}
+        current_tokens = 0
+        for key, value in items:
+            tokens = self._count_tokens(compact_json({key: value}))
+            if tokens > budget and isinstance(value, dict) and len(value) > 1:
+                # Oversized group: split it into numbered parts, each its own batch. The parts
+                # are packed to the budget minus the cost of the "key#n" wrapper around them.
+                wrapper = self._count_tokens(compact_json({f"{key}#{len(value)}": {}}))
+                parts = self._pack(list(value.items()), budget - wrapper)
+                batches.extend({f"{key}#{i + 1}": part} for i, part in enumerate(parts))
+                continue
+            if current and current_tokens + tokens > budget:
+                batches.append(current)
+                current, current_tokens = {}, 0
+            current[key] = value
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    def _run_batch(self, system_prompt: str, contents: List[str]) -> List[Dict[str, Any]]:
+        """Run independent prompts concurrently, bounded by max_concurrency."""
+        prompts = [
+            ChatPromptTemplate.from_messages([
+                SystemMessage(content=system_prompt),
+                HumanMessage(content=content)
+            ]).format_messages()
+            for content in contents
+        ]
+        responses = self.llm.batch(prompts, config={"max_concurrency": self.max_concurrency})
+        return [self._parse_response(response.content) for response in responses]
+
+    def _trim_to_budget(self, parts: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Shrink partial analyses that cannot be merged any further until they fit the budget.
+
+        The last entry of the longest list section is dropped first (models list the most
+        important findings first); analyses without lists have their longest text shortened.
+        """
+        parts = json.loads(compact_json(parts))  # deep copy
+        trimmed = False
+        while self._count_tokens(compact_json(parts)) > self.token_budget:
+            lists, texts = [], []
+            for part in parts.values():
+                for key, value in (part.items() if isinstance(part, dict) else []):
+                    if isinstance(value, list) and value:
+                        lists.append(value)
+                    elif isinstance(value, str) and value:
+                        texts.append((part, key))
+            if lists:
+                max(lists, key=len).pop()
+            elif texts:
+                part, key = max(texts, key=lambda text: len(text[0][text[1]]))
+                part[key] = part[key][:len(part[key]) * 3 // 4]
+            else:
+                break
+            trimmed = True
+        if trimmed:
+            print(f"Trimmed {len(parts)} partial analyses to fit the {self.token_budget}-token synthesis budget")
+        return parts
+
+    def analyze_data_hierarchical(self, quantitative_data: Dict[str, Any], qualitative_data: Dict[str, str]) -> Dict[str, Any]:
+        """
+        Analyze large datasets in a map-reduce fashion under the token budget.
+
+        Data is grouped by source/topic, packed into budget-sized batches that are
+        analyzed concurrently, and the partial analyses are merged; if the partials
+        themselves exceed the budget they are merged in further rounds. The final
+        synthesis prompt stays bounded regardless of how many metrics were extracted.
+        """
+        groups = self.group_data(quantitative_data, qualitative_data)
+        batches = self._pack(list(groups.items()))
+        if len(batches) <= 1:
+            return self.analyze_data(quantitative_data, qualitative_data, mode="single")
+
+        partials = self._run_batch(
+            PARTIAL_ANALYSIS_SYSTEM_PROMPT,
+            [f"Analyze this slice of the data (groups: {', '.join(batch)}):\n\n{compact_json(batch)}" for batch in batches]
+        )
+        print(f"Analyzed {len(groups)} groups in {len(batches)} concurrent batches")
+
+        # Merge partial analyses in rounds until they fit into a single synthesis prompt
+        while len(partials) > 1:
+            merge_batches = self._pack([(f"part_{i + 1}", partial) for i, partial in enumerate(partials)])
+            if len(merge_batches) == 1 or len(merge_batches) >= len(partials):
+                break  # fits, or individual partials are too large to merge any further
+            partials = self._run_batch(
+                SYNTHESIS_SYSTEM_PROMPT,
+                [f"Merge these partial analyses:\n\n{compact_json(batch)}" for batch in merge_batches]
+            )
+
+        final_parts = self._trim_to_budget({f"part_{i + 1}": partial for i, partial in enumerate(partials)})
+        return self._invoke_json(
+            SYNTHESIS_SYSTEM_PROMPT,
+            f"Merge these partial analyses into the final analysis:\n\n{compact_json(final_parts)}"
+        )
+
     def generate_summary_report(self, analysis: Dict[str, Any]) -> str:
         """Generate a human-readable summary report based on the analysis."""
-        analysis_str = json.dumps(analysis, indent=2)
-        
+        analysis_str = compact_json(analysis)
+
         prompt = ChatPromptTemplate.from_messages([
             SystemMessage(content="You are a business intelligence specialist. Create a clear, concise executive summary report based on the provided data analysis. The report should highlight key findings, insights, trends, and actionable recommendations."),
             HumanMessage(content=f"Generate a summary report based on this analysis:\n\n{analysis_str}")
         ])
-        
+
         # response = self.llm.invoke(prompt)
         formatted = prompt.format_messages()  # ✅ creates list[BaseMessage]
         response = self.llm.invoke(formatted)
 
-        return response.content
\ No newline at end of file
+        return response.content
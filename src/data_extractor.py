@@ -1,6 +1,6 @@
 import re
 import json
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Tuple
 
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_openai import ChatOpenAI
@@ -22,6 +22,31 @@ class DataExtractor:
         """Split documents into manageable chunks."""
         return self.text_splitter.split_documents(documents)
     
+    @staticmethod
+    def flatten_quantitative_data(data: Dict[str, Any]) -> List[Tuple[str, str, Any]]:
+        """
+        Flatten extracted quantitative data into (source, name, value) rows.
+
+        Nested objects returned by the LLM are treated as groups: the top-level key
+        becomes the source/topic and the remaining path (joined with '.') the metric
+        name. Flat metrics have an empty source.
+        """
+        rows = []
+
+        def walk(source: str, prefix: str, value: Any):
+            if isinstance(value, dict):
+                for key, child in value.items():
+                    walk(source, f"{prefix}.{key}" if prefix else str(key), child)
+            else:
+                rows.append((source, prefix, value))
+
+        for key, value in (data or {}).items():
+            if isinstance(value, dict):
+                walk(str(key), "", value)
+            else:
+                rows.append(("", str(key), value))
+        return rows
+
     def _clean_json_response(self, text: str) -> str:
         """
         Remove markdown code block delimiters (like ```json ... ```) and extra whitespace.
@@ -1,4 +1,5 @@
 import os
+import hashlib
 from typing import List
 from pathlib import Path
 
@@ -50,13 +51,33 @@ class DocumentProcessor:
             raise ValueError(f"Unsupported file type: {file_extension}")
 
     @staticmethod
-    def extract_from_multiple_files(file_paths: List[str]) -> List[Document]:
-        """Process multiple files and return combined documents."""
+    def fingerprint_files(file_paths: List[str]) -> str:
+        """Compute a stable fingerprint of a corpus from file names and contents."""
+        digest = hashlib.sha256()
+        for file_path in sorted(file_paths, key=lambda p: Path(p).name):
+            digest.update(Path(file_path).name.encode("utf-8"))
+            digest.update(b"\0")
+            with open(file_path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(block)
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    @staticmethod
+    def extract_from_multiple_files(file_paths: List[str], profiler=None) -> List[Document]:
+        """
+        Process multiple files and return combined documents.
+
+        If a StageProfiler with loader profiling enabled is given, each loader call
+        is profiled as its own stage.
+        """
         all_documents = []
         
         for file_path in file_paths:
             try:
                 loader_func = DocumentProcessor.get_loader_for_file(file_path)
+                if profiler is not None and profiler.profile_loaders:
+                    loader_func = profiler.wrap(f"load:{Path(file_path).name}", loader_func)
                 documents = loader_func(file_path)
                 
                 # Add source metadata
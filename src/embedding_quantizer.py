@@ -0,0 +1,319 @@
+import os
+import shutil
+import weakref
+import tempfile
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+
+import numpy as np
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize rows so inner product equals cosine similarity."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class ScalarQuantizer:
+    """Per-dimension int8 scalar quantization (4x smaller than float32)."""
+
+    def __init__(self):
+        self.offset: Optional[np.ndarray] = None
+        self.scale: Optional[np.ndarray] = None
+
+    def fit(self, vectors: np.ndarray) -> "ScalarQuantizer":
+        return self.fit_range(vectors.min(axis=0), vectors.max(axis=0))
+
+    def fit_range(self, low: np.ndarray, high: np.ndarray) -> "ScalarQuantizer":
+        """Fit from per-dimension minima and maxima, e.g. accumulated over batches."""
+        self.scale = np.maximum(high - low, 1e-12).astype(np.float32) / 255.0
+        # Code c in [-128, 127] decodes to offset + scale * c
+        self.offset = (low + 128.0 * self.scale).astype(np.float32)
+        return self
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        codes = np.rint((vectors - self.offset) / self.scale)
+        return np.clip(codes, -128, 127).astype(np.int8)
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        return self.offset + self.scale * codes.astype(np.float32)
+
+    def score(self, codes: np.ndarray, query: np.ndarray, block_size: int = 65536) -> np.ndarray:
+        """Approximate inner products of query with every encoded vector."""
+        weights = (query * self.scale).astype(np.float32)
+        bias = float(query @ self.offset)
+        scores = np.empty(len(codes), dtype=np.float32)
+        # Decode in blocks so scoring never materializes the full float matrix
+        for start in range(0, len(codes), block_size):
+            block = codes[start:start + block_size]
+            scores[start:start + block_size] = block.astype(np.float32) @ weights + bias
+        return scores
+
+    def bytes_per_vector(self, dimension: int) -> int:
+        return dimension
+
+
+class ProductQuantizer:
+    """Product quantization: each subvector is replaced by the id of its nearest of 256 centroids."""
+
+    def __init__(self, num_subvectors: int, num_centroids: int = 256, iterations: int = 10,
+                 training_sample: int = 10000, seed: int = 0):
+        if num_centroids > 256:
+            raise ValueError("num_centroids must be at most 256 to fit codes in uint8")
+        self.num_subvectors = num_subvectors
+        self.num_centroids = num_centroids
+        self.iterations = iterations
+        self.training_sample = training_sample
+        self.seed = seed
+        self.centroids: Optional[np.ndarray] = None  # (num_subvectors, num_centroids, sub_dim)
+
+    def _split(self, vectors: np.ndarray) -> np.ndarray:
+        n, dimension = vectors.shape
+        if dimension % self.num_subvectors:
+            raise ValueError(f"Dimension {dimension} is not divisible by {self.num_subvectors} subvectors")
+        return vectors.reshape(n, self.num_subvectors, dimension // self.num_subvectors)
+
+    @staticmethod
+    def _nearest(points: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        """Nearest centroid per point, batched over subspaces: (g, n, d) x (g, k, d) -> (g, n)."""
+        # argmin ||p - c||^2 = argmin (||c||^2 - 2 p.c); folded into a single matmul as [p, 1] . [-2c, ||c||^2]
+        ones = np.ones(points.shape[:2] + (1,), dtype=np.float32)
+        augmented_points = np.concatenate([points, ones], axis=2)
+        augmented_centroids = np.concatenate(
+            [-2.0 * centroids, (centroids ** 2).sum(axis=2, keepdims=True)], axis=2
+        ).astype(np.float32)
+        return np.matmul(augmented_points, augmented_centroids.transpose(0, 2, 1)).argmin(axis=2)
+
+    def fit(self, vectors: np.ndarray, group_size: int = 16) -> "ProductQuantizer":
+        rng = np.random.default_rng(self.seed)
+        if len(vectors) > self.training_sample:
+            vectors = vectors[rng.choice(len(vectors), self.training_sample, replace=False)]
+        # (num_subvectors, n, sub_dim) so groups of subspaces are trained together
+        subvectors = np.ascontiguousarray(self._split(vectors).transpose(1, 0, 2))
+        n, sub_dim = subvectors.shape[1], subvectors.shape[2]
+        k = min(self.num_centroids, n)
+
+        centroids = np.empty((self.num_subvectors, k, sub_dim), dtype=np.float32)
+        # Keep the (subspaces x points x centroids) distance tensor to ~16 MiB of float32
+        group_size = max(1, min(group_size, (1 << 22) // (n * k)))
+        for start in range(0, self.num_subvectors, group_size):
+            points = subvectors[start:start + group_size]
+            groups = len(points)
+            centers = np.stack([p[rng.choice(n, k, replace=False)] for p in points])
+            offsets = (np.arange(groups) * k)[:, None]
+            for _ in range(self.iterations):
+                flat = (self._nearest(points, centers) + offsets).ravel()
+                counts = np.bincount(flat, minlength=groups * k).reshape(groups, k)
+                sums = np.stack(
+                    [np.bincount(flat, weights=points[:, :, j].ravel(), minlength=groups * k) for j in range(sub_dim)],
+                    axis=1,
+                ).reshape(groups, k, sub_dim)
+                populated = counts > 0
+                centers[populated] = sums[populated] / counts[populated][:, None]
+            centroids[start:start + groups] = centers
+        self.centroids = centroids
+        return self
+
+    def encode(self, vectors: np.ndarray, block_size: int = 4096, group_size: int = 16) -> np.ndarray:
+        subvectors = self._split(vectors)
+        codes = np.empty((len(vectors), self.num_subvectors), dtype=np.uint8)
+        # Blocked so the (subspaces x rows x centroids) distance tensor stays small
+        for row in range(0, len(vectors), block_size):
+            block = subvectors[row:row + block_size].transpose(1, 0, 2)
+            for start in range(0, self.num_subvectors, group_size):
+                nearest = self._nearest(block[start:start + group_size], self.centroids[start:start + group_size])
+                codes[row:row + block_size, start:start + group_size] = nearest.T
+        return codes
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        parts = [self.centroids[m][codes[:, m]] for m in range(self.num_subvectors)]
+        return np.concatenate(parts, axis=1)
+
+    def score(self, codes: np.ndarray, query: np.ndarray, block_size: int = 65536) -> np.ndarray:
+        """Asymmetric distance computation: sum of per-subvector lookup-table entries."""
+        sub_query = query.reshape(self.num_subvectors, -1)
+        tables = np.einsum("md,mkd->mk", sub_query, self.centroids)
+        subspace = np.arange(self.num_subvectors)
+        scores = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), block_size):
+            block = codes[start:start + block_size]
+            scores[start:start + block_size] = tables[subspace, block].sum(axis=1)
+        return scores
+
+    def bytes_per_vector(self, dimension: int) -> int:
+        return self.num_subvectors
+
+
+class QuantizedEmbeddingStore:
+    """
+    Compressed local copy of embeddings for fast approximate search.
+
+    Only the quantized codes are held in memory. Candidates are scored over the codes
+    in a vectorized pass, and the top ``k * rerank_factor`` are re-ranked exactly
+    against the full-precision vectors, which are kept in a memory-mapped file on
+    disk so only the candidate rows are ever read. Without a ``float_path`` that file
+    lives in a temporary directory owned by the store: rebuilds overwrite it, and it is
+    removed by ``close()`` or when the store is garbage collected.
+    """
+
+    def __init__(self, method: str = "int8", pq_subvectors: Optional[int] = None,
+                 rerank_factor: int = 4, float_path: Optional[str] = None):
+        if method not in ("int8", "pq"):
+            raise ValueError(f"Unsupported quantization method: {method}")
+        self.method = method
+        self.pq_subvectors = pq_subvectors
+        self.rerank_factor = rerank_factor
+        self.float_path = float_path
+        self.ids: List[Any] = []
+        self.codes: Optional[np.ndarray] = None
+        self.vectors: Optional[np.ndarray] = None
+        self.quantizer = None
+        self.dimension = 0
+        self._temp_dir: Optional[str] = None
+        self._cleanup: Optional[weakref.finalize] = None
+
+    def _vectors_path(self) -> str:
+        if self.float_path is not None:
+            return self.float_path
+        if self._temp_dir is None:
+            self._temp_dir = tempfile.mkdtemp(prefix="embeddings-")
+            self._cleanup = weakref.finalize(self, shutil.rmtree, self._temp_dir, ignore_errors=True)
+        return os.path.join(self._temp_dir, "vectors.f32")
+
+    def close(self):
+        """Release the memory-mapped vectors and delete the store's temporary directory, if any."""
+        self.vectors = None
+        self.codes = None
+        self.ids = []
+        if self._cleanup is not None:
+            self._cleanup()
+            self._temp_dir = self._cleanup = None
+
+    def build(self, ids: List[Any], vectors) -> "QuantizedEmbeddingStore":
+        """Train the quantizer on the vectors, encode them and spill the floats to disk."""
+        if len(ids) != len(vectors):
+            raise ValueError("ids and vectors must have the same length")
+        return self.build_from_batches([(ids, vectors)])
+
+    def build_from_batches(self, batches: Iterable[Tuple[List[Any], Any]],
+                           training_sample: int = 4096, block_size: int = 1024,
+                           seed: int = 0) -> "QuantizedEmbeddingStore":
+        """
+        Build the store from (ids, vectors) batches without holding every vector in memory.
+
+        Each batch is normalized and appended to the memory-mapped float file, which grows
+        as needed; int8 ranges are accumulated exactly along the way. Product quantization
+        is fit on a random sample of at most ``training_sample`` rows. The codes are then
+        encoded block by block from the file, so peak memory is bounded by a batch, a block
+        or the training sample of floats plus the codes themselves, whatever the corpus size.
+        """
+        path = self._vectors_path()
+        self.vectors = None  # unmap the previous build before overwriting its file
+        ids: List[Any] = []
+        stored = low = high = None
+        count = capacity = 0
+        for batch_ids, batch_vectors in batches:
+            batch = _normalize(batch_vectors)
+            if not len(batch):
+                continue
+            if len(batch_ids) != len(batch):
+                raise ValueError("ids and vectors must have the same length")
+            if stored is None:
+                self.dimension = batch.shape[1]
+                capacity = max(1024, len(batch))
+                stored = np.memmap(path, dtype=np.float32, mode="w+", shape=(capacity, self.dimension))
+            elif count + len(batch) > capacity:
+                # Grow the file geometrically and remap it
+                stored.flush()
+                del stored
+                capacity = max(2 * capacity, count + len(batch))
+                with open(path, "r+b") as f:
+                    f.truncate(capacity * self.dimension * 4)
+                stored = np.memmap(path, dtype=np.float32, mode="r+", shape=(capacity, self.dimension))
+            stored[count:count + len(batch)] = batch
+            low = batch.min(axis=0) if low is None else np.minimum(low, batch.min(axis=0))
+            high = batch.max(axis=0) if high is None else np.maximum(high, batch.max(axis=0))
+            count += len(batch)
+            ids.extend(batch_ids)
+        if not count:
+            raise ValueError("Cannot build a quantized store from no vectors")
+        stored.flush()
+        del stored
+        with open(path, "r+b") as f:
+            f.truncate(count * self.dimension * 4)
+        self.vectors = np.memmap(path, dtype=np.float32, mode="r", shape=(count, self.dimension))
+        self.ids = ids
+
+        if self.method == "int8":
+            self.quantizer = ScalarQuantizer().fit_range(low, high)
+        else:
+            rng = np.random.default_rng(seed)
+            sample = self.vectors[np.sort(rng.choice(count, min(count, training_sample), replace=False))]
+            # Default to dimension / 4 one-byte codes: 16x smaller than float32
+            subvectors = self.pq_subvectors or max(1, self.dimension // 4)
+            self.quantizer = ProductQuantizer(subvectors, training_sample=training_sample, seed=seed).fit(sample)
+            del sample
+
+        self.codes = None
+        for start in range(0, count, block_size):
+            block_codes = self.quantizer.encode(np.asarray(self.vectors[start:start + block_size]))
+            if self.codes is None:
+                self.codes = np.empty((count, block_codes.shape[1]), dtype=block_codes.dtype)
+            self.codes[start:start + block_size] = block_codes
+        return self
+
+    def _search_positions(self, query: np.ndarray, k: int, rerank: bool) -> Tuple[np.ndarray, np.ndarray]:
+        approx = self.quantizer.score(self.codes, query)
+        candidates = min(len(approx), k * self.rerank_factor if rerank else k)
+        top = np.argpartition(-approx, candidates - 1)[:candidates]
+        if rerank:
+            top = np.sort(top)  # sequential reads from the memory-mapped floats
+            scores = self.vectors[top] @ query
+        else:
+            scores = approx[top]
+        order = np.argsort(-scores)[:k]
+        return top[order], scores[order]
+
+    def search(self, query, k: int = 5, rerank: bool = True) -> List[Tuple[Any, float]]:
+        """Return the top-k (id, cosine similarity) pairs for a query embedding."""
+        if self.codes is None or not len(self.ids):
+            return []
+        positions, scores = self._search_positions(_normalize(query), k, rerank)
+        return [(self.ids[p], float(score)) for p, score in zip(positions, scores)]
+
+    def memory_report(self) -> Dict[str, Any]:
+        """In-memory footprint of the codes compared with float32 storage."""
+        code_bytes = self.quantizer.bytes_per_vector(self.dimension)
+        float_bytes = self.dimension * 4
+        return {
+            "method": self.method,
+            "vectors": len(self.ids),
+            "bytes_per_vector": code_bytes,
+            "float32_bytes_per_vector": float_bytes,
+            "compression_ratio": round(float_bytes / code_bytes, 2),
+            "code_bytes_total": int(self.codes.nbytes),
+        }
+
+    def evaluate_recall(self, queries, k: int = 10) -> Dict[str, Any]:
+        """
+        Measure recall@k against exact float search, with and without re-ranking,
+        alongside the memory report, to show the recall-versus-memory trade-off.
+        """
+        queries = _normalize(queries)
+        hits_approx = hits_rerank = 0
+        for query in queries:
+            exact = set(np.argsort(-(self.vectors @ query))[:k].tolist())
+            approx = set(self._search_positions(query, k, rerank=False)[0].tolist())
+            reranked = set(self._search_positions(query, k, rerank=True)[0].tolist())
+            hits_approx += len(exact & approx)
+            hits_rerank += len(exact & reranked)
+        total = max(1, len(queries) * min(k, len(self.ids)))
+        report = self.memory_report()
+        report.update({
+            "k": k,
+            "queries": len(queries),
+            "recall_approx": round(hits_approx / total, 4),
+            "recall_reranked": round(hits_rerank / total, 4),
+        })
+        return report
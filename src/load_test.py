@@ -0,0 +1,295 @@
+import os
+import json
+import math
+import time
+import uuid
+import tempfile
+import threading
+import urllib.request
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional
+
+from openai.types import CreateEmbeddingResponse
+from openai.types.chat import ChatCompletion
+
+from src.multi_agent_workflow import MultiAgentWorkflow
+from src.query_system import QuerySystem
+from src.results_store import ResultsStore
+from src.vector_db_manager import VectorDBManager, DEFAULT_NAMESPACE
+from src.mock_services import serve, parse_latency_specs
+
+DEFAULT_FILES = ["source/document1.pdf", "source/spreadsheet.xlsx", "source/contract.pdf"]
+DEFAULT_QUESTIONS = [
+    "What are the key figures in these documents?",
+    "Summarize the main contract terms.",
+    "Which metrics changed the most?",
+]
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of a list of values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct * len(ordered) / 100.0))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class LoadRecorder:
+    """Thread-safe collection of per-operation latencies and failures."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples: Dict[str, List[float]] = {}
+        self.errors: Dict[str, List[str]] = {}
+
+    def record(self, operation: str, latency: float, error: Optional[str] = None):
+        with self._lock:
+            self.samples.setdefault(operation, []).append(latency)
+            if error:
+                self.errors.setdefault(operation, []).append(error)
+
+    def summary(self, wall_time: float) -> Dict[str, Dict[str, Any]]:
+        report = {}
+        for operation, latencies in self.samples.items():
+            errors = self.errors.get(operation, [])
+            report[operation] = {
+                "count": len(latencies),
+                "errors": len(errors),
+                "error_rate": round(len(errors) / len(latencies), 4),
+                "throughput_per_s": round(len(latencies) / wall_time, 3) if wall_time else None,
+                "p50_s": round(percentile(latencies, 50), 3),
+                "p95_s": round(percentile(latencies, 95), 3),
+                "p99_s": round(percentile(latencies, 99), 3),
+                "max_s": round(max(latencies), 3),
+                "sample_errors": sorted(set(errors))[:3],
+            }
+        return report
+
+
+class LoadTestHarness:
+    """
+    Simulates concurrent upload and query sessions against MultiAgentWorkflow and QuerySystem.
+
+    Each upload session builds its own workflow (as a Streamlit session would) and runs
+    the full pipeline; each query session opens a QuerySystem on a shared, pre-populated
+    corpus namespace and asks a series of questions.
+    """
+
+    def __init__(self, files: List[str], questions: List[str], openai_api_key: str, pinecone_api_key: str,
+                 openai_url: Optional[str] = None, pinecone_url: Optional[str] = None):
+        self.files = files
+        self.questions = questions
+        self.openai_api_key = openai_api_key
+        self.pinecone_api_key = pinecone_api_key
+        # Base URLs of mock servers exposing /mock/stats, if any
+        self.openai_url = openai_url
+        self.pinecone_url = pinecone_url
+        self.query_namespace: Optional[str] = None
+        self.ready = False
+
+    def _workflow(self, session_id: str):
+        return MultiAgentWorkflow(
+            openai_api_key=self.openai_api_key,
+            pinecone_api_key=self.pinecone_api_key,
+            results_store=ResultsStore(),
+            session_id=session_id,
+        )
+
+    def setup(self):
+        """
+        One-time setup before the first load level, so start-up races are not reported
+        as errors of the system under test.
+
+        Creates the Pinecone index (otherwise concurrent sessions all try to and all but
+        one fail with 409 Conflict) and builds the OpenAI SDK's response models, which are
+        built lazily and can parse the first concurrent responses of a fresh process into
+        empty objects (KeyError: 'choices').
+        """
+        if self.ready:
+            return
+        for model in (ChatCompletion, CreateEmbeddingResponse):
+            model.model_rebuild(force=True)
+        VectorDBManager(api_key=self.pinecone_api_key, namespace=DEFAULT_NAMESPACE)
+        self.ready = True
+
+    def prepare(self):
+        """Create the corpus shared by query sessions."""
+        self.setup()
+        workflow = self._workflow(session_id="loadtest-queries")
+        results = workflow.run(self.files)
+        if results["status"] != "success":
+            raise RuntimeError(f"Load test setup failed: {results.get('error')}")
+        self.query_namespace = workflow.vector_db_manager.namespace
+
+    def upload_session(self, recorder: LoadRecorder):
+        start = time.perf_counter()
+        try:
+            results = self._workflow(session_id=uuid.uuid4().hex).run(self.files)
+            error = None if results["status"] == "success" else f"{results.get('current_stage')}: {results.get('error')}"
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        recorder.record("upload", time.perf_counter() - start, error)
+
+    def query_session(self, recorder: LoadRecorder, queries: int):
+        start = time.perf_counter()
+        try:
+            manager = VectorDBManager(api_key=self.pinecone_api_key, namespace=self.query_namespace)
+            query_system = QuerySystem(manager)
+        except Exception as e:
+            recorder.record("query_session_setup", time.perf_counter() - start, f"{type(e).__name__}: {e}")
+            return
+        recorder.record("query_session_setup", time.perf_counter() - start)
+
+        for i in range(queries):
+            start = time.perf_counter()
+            try:
+                query_system.ask(self.questions[i % len(self.questions)])
+                error = None
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            recorder.record("query", time.perf_counter() - start, error)
+
+    def _mock_stats(self) -> Dict[str, Any]:
+        stats = {}
+        for name, url in (("openai", self.openai_url), ("pinecone", self.pinecone_url)):
+            if url:
+                with urllib.request.urlopen(f"{url}/mock/stats", timeout=10) as response:
+                    stats[name] = json.loads(response.read())
+        return stats
+
+    @staticmethod
+    def _diff_stats(before: Dict[str, Any], after: Dict[str, Any]) -> Dict[str, Any]:
+        diff = {}
+        for service, endpoints in after.items():
+            for endpoint, counters in endpoints.items():
+                previous = before.get(service, {}).get(endpoint, {})
+                diff.setdefault(service, {})[endpoint] = {
+                    key: value - previous.get(key, 0) for key, value in counters.items()
+                }
+        return diff
+
+    def run(self, concurrency: int, uploads: int, query_sessions: int, queries_per_session: int) -> Dict[str, Any]:
+        """Run one load level and return its report."""
+        self.setup()
+        if query_sessions and self.query_namespace is None:
+            self.prepare()
+        recorder = LoadRecorder()
+        stats_before = self._mock_stats()
+
+        # Interleave session types so both run concurrently throughout the test
+        tasks = []
+        for i in range(max(uploads, query_sessions)):
+            if i < uploads:
+                tasks.append(lambda: self.upload_session(recorder))
+            if i < query_sessions:
+                tasks.append(lambda: self.query_session(recorder, queries_per_session))
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for future in [executor.submit(task) for task in tasks]:
+                future.result()
+        wall_time = time.perf_counter() - start
+
+        return {
+            "concurrency": concurrency,
+            "wall_time_s": round(wall_time, 3),
+            "operations": recorder.summary(wall_time),
+            "mock_usage": self._diff_stats(stats_before, self._mock_stats()),
+        }
+
+
+def start_mock_servers(**options):
+    """Start the mock servers in a separate process so they don't compete for the GIL."""
+    context = multiprocessing.get_context("spawn")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=serve, kwargs=dict(options, ready=sender), daemon=True)
+    process.start()
+    if not receiver.poll(60):
+        process.terminate()
+        raise RuntimeError("Mock servers did not start")
+    openai_url, pinecone_url = receiver.recv()
+    return process, openai_url, pinecone_url
+
+
+def print_report(report: Dict[str, Any]):
+    print(f"\n=== CONCURRENCY {report['concurrency']} (wall time {report['wall_time_s']}s) ===")
+    print(f"{'operation':<22}{'count':>7}{'err%':>8}{'ops/s':>9}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for operation, row in report["operations"].items():
+        print(
+            f"{operation:<22}{row['count']:>7}{row['error_rate'] * 100:>7.1f}%{row['throughput_per_s']:>9.2f}"
+            f"{row['p50_s']:>9.3f}{row['p95_s']:>9.3f}{row['p99_s']:>9.3f}"
+        )
+        for error in row["sample_errors"]:
+            print(f"    e.g. {' '.join(error.split())[:160]}")
+    for service, endpoints in report["mock_usage"].items():
+        for endpoint, counters in endpoints.items():
+            print(f"  {service}/{endpoint}: {counters}")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Load-test the workflow and query system against mock services.")
+    parser.add_argument("--files", nargs="+", default=DEFAULT_FILES)
+    parser.add_argument("--uploads", type=int, default=8, help="Upload sessions per load level")
+    parser.add_argument("--query-sessions", type=int, default=8, help="Query sessions per load level")
+    parser.add_argument("--queries-per-session", type=int, default=3)
+    parser.add_argument("--concurrency", default="1,4,8", help="Comma-separated concurrency levels to sweep")
+    parser.add_argument("--latency", action="append", default=[], help="Mock latency spec (see src.mock_services)")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--tokens-per-minute", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--no-mock", action="store_true",
+                        help="Use the endpoints and API keys already configured in the environment")
+    parser.add_argument("--output", help="Write the full JSON report to this file")
+    args = parser.parse_args()
+
+    process = None
+    openai_url = pinecone_url = None
+    if not args.no_mock:
+        process, openai_url, pinecone_url = start_mock_servers(
+            latency=parse_latency_specs(args.latency),
+            error_rate=args.error_rate,
+            rate_limit_rate=args.rate_limit_rate,
+            tokens_per_minute=args.tokens_per_minute,
+            seed=args.seed,
+        )
+        data_dir = tempfile.mkdtemp(prefix="loadtest-")
+        os.environ.update({
+            "OPENAI_API_KEY": "mock",
+            "OPENAI_BASE_URL": f"{openai_url}/v1",
+            "PINECONE_API_KEY": "mock",
+            "PINECONE_CONTROLLER_HOST": pinecone_url,
+            "RESULTS_DB_PATH": os.path.join(data_dir, "runs.db"),
+            "NAMESPACE_REGISTRY_PATH": os.path.join(data_dir, "namespaces.db"),
+        })
+
+    harness = LoadTestHarness(
+        files=args.files,
+        questions=DEFAULT_QUESTIONS,
+        openai_api_key=os.getenv("OPENAI_API_KEY"),
+        pinecone_api_key=os.getenv("PINECONE_API_KEY"),
+        openai_url=openai_url,
+        pinecone_url=pinecone_url,
+    )
+    reports = []
+    try:
+        for level in [int(level) for level in args.concurrency.split(",")]:
+            report = harness.run(level, args.uploads, args.query_sessions, args.queries_per_session)
+            print_report(report)
+            reports.append(report)
+    finally:
+        if process is not None:
+            process.terminate()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(reports, f, indent=2)
+        print(f"\nWrote report to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,526 @@
+import re
+import json
+import math
+import time
+import base64
+import random
+import hashlib
+import threading
+from abc import ABC, abstractmethod
+from urllib.parse import parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+
+
+class LatencyDistribution:
+    """
+    Samples artificial response latency in seconds.
+
+    Specs look like "fixed:ms=50", "uniform:low_ms=20,high_ms=200",
+    "lognormal:median_ms=300,sigma=0.6" or "exponential:mean_ms=100".
+    """
+
+    def __init__(self, kind: str = "fixed", **params: float):
+        if kind not in ("fixed", "uniform", "lognormal", "exponential"):
+            raise ValueError(f"Unsupported latency distribution: {kind}")
+        self.kind = kind
+        self.params = params
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyDistribution":
+        kind, _, raw_params = spec.partition(":")
+        params = {}
+        for pair in filter(None, raw_params.split(",")):
+            key, _, value = pair.partition("=")
+            params[key.strip()] = float(value)
+        return cls(kind.strip(), **params)
+
+    def sample(self, rng: random.Random) -> float:
+        p = self.params
+        if self.kind == "fixed":
+            ms = p.get("ms", 0.0)
+        elif self.kind == "uniform":
+            ms = rng.uniform(p.get("low_ms", 0.0), p.get("high_ms", 0.0))
+        elif self.kind == "lognormal":
+            ms = rng.lognormvariate(math.log(max(p.get("median_ms", 1.0), 1e-3)), p.get("sigma", 0.5))
+        else:
+            ms = rng.expovariate(1.0 / max(p.get("mean_ms", 1.0), 1e-3))
+        return ms / 1000.0
+
+
+def estimate_tokens(value: Any) -> int:
+    """Rough token count (~4 characters per token; token-id arrays count exactly)."""
+    if isinstance(value, list) and value and isinstance(value[0], int):
+        return len(value)
+    if isinstance(value, list):
+        return sum(estimate_tokens(item) for item in value)
+    return max(1, len(str(value)) // 4)
+
+
+class _MockServer(ABC):
+    """Threaded HTTP server with latency/error injection and per-endpoint accounting."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: Optional[Dict[str, LatencyDistribution]] = None,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        tokens_per_minute: Optional[int] = None,
+        seed: Optional[int] = None,
+    ):
+        # latency maps an endpoint name (or "default") to its distribution
+        self.latency = latency or {}
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.tokens_per_minute = tokens_per_minute
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._token_window: List[Tuple[float, int]] = []
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+        handler = self._make_handler()
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "_MockServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        """Copy of the per-endpoint counters (requests, errors, 429s, tokens)."""
+        with self._lock:
+            return {endpoint: dict(counters) for endpoint, counters in self.stats.items()}
+
+    def _count(self, endpoint: str, **increments: int):
+        with self._lock:
+            counters = self.stats.setdefault(
+                endpoint, {"requests": 0, "errors": 0, "rate_limited": 0, "prompt_tokens": 0, "completion_tokens": 0}
+            )
+            for key, value in increments.items():
+                counters[key] = counters.get(key, 0) + value
+
+    def _over_token_budget(self, tokens: int) -> bool:
+        if not self.tokens_per_minute:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            self._token_window = [(t, n) for t, n in self._token_window if now - t < 60.0]
+            if sum(n for _, n in self._token_window) + tokens > self.tokens_per_minute:
+                return True
+            self._token_window.append((now, tokens))
+            return False
+
+    def _inject(self, endpoint: str, tokens: int = 0) -> Optional[Tuple[int, Dict[str, Any]]]:
+        """Sleep for the sampled latency and decide whether to fail this request."""
+        distribution = self.latency.get(endpoint) or self.latency.get("default")
+        with self._lock:
+            delay = distribution.sample(self._rng) if distribution else 0.0
+            roll = self._rng.random()
+        if delay:
+            time.sleep(delay)
+        if roll < self.rate_limit_rate or self._over_token_budget(tokens):
+            self._count(endpoint, rate_limited=1)
+            return 429, {"error": {"message": "Rate limit exceeded (mock)", "type": "rate_limit_error", "code": "rate_limit_exceeded"}}
+        if roll < self.rate_limit_rate + self.error_rate:
+            self._count(endpoint, errors=1)
+            return 500, {"error": {"message": "Injected server error (mock)", "type": "server_error"}}
+        return None
+
+    @abstractmethod
+    def route(self, method: str, path: str, body: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        """Handle one API request and return its status code and JSON body."""
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _handle(self, method: str):
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                try:
+                    body = json.loads(raw) if raw else {}
+                except json.JSONDecodeError:
+                    body = {}
+                path, _, query = self.path.partition("?")
+                # Query parameters (e.g. GET /vectors/fetch?ids=a&ids=b) are merged into the body
+                for key, values in parse_qs(query).items():
+                    body.setdefault(key, values if key == "ids" else values[0])
+                try:
+                    status, payload = server.route(method, path, body)
+                except Exception as e:
+                    status, payload = 500, {"error": {"message": f"Mock server failure: {e}"}}
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                if status == 429:
+                    self.send_header("Retry-After", "1")
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._handle("GET")
+
+            def do_POST(self):
+                self._handle("POST")
+
+            def do_DELETE(self):
+                self._handle("DELETE")
+
+            def do_PATCH(self):
+                self._handle("PATCH")
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+class MockOpenAIServer(_MockServer):
+    """Mock of the OpenAI chat completions and embeddings endpoints."""
+
+    def __init__(self, dimension: int = 1536, **kwargs):
+        super().__init__(**kwargs)
+        self.dimension = dimension
+
+    def _embed(self, value: Any) -> np.ndarray:
+        """Deterministic pseudo-embedding so identical inputs retrieve each other."""
+        seed = int.from_bytes(hashlib.sha256(json.dumps(value).encode("utf-8")).digest()[:8], "little")
+        vector = np.random.default_rng(seed).standard_normal(self.dimension).astype(np.float32)
+        return vector / np.linalg.norm(vector)
+
+    @staticmethod
+    def _completion_content(messages: List[Dict[str, Any]]) -> str:
+        """Plausible JSON output so the extraction and analysis parsers succeed."""
+        text = " ".join(str(m.get("content") or "") for m in messages)
+        numbers = re.findall(r"\d+(?:\.\d+)?", text)[:20]
+        if "numerical" in text.lower():
+            return json.dumps({f"metric_{i + 1}": float(n) for i, n in enumerate(numbers)})
+        if "executive summary" in text.lower():
+            return "Mock executive summary: the documents were processed successfully."
+        return json.dumps({
+            "key_findings": ["Mock finding derived from the provided data."],
+            "trends": ["Mock trend."],
+            "implications": ["Mock implication."],
+            "recommendations": ["Mock recommendation."],
+        })
+
+    def route(self, method: str, path: str, body: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        path = path[3:] if path.startswith("/v1") else path
+        if method == "GET" and path == "/mock/stats":
+            return 200, self.snapshot()
+
+        if method == "POST" and path == "/chat/completions":
+            messages = body.get("messages", [])
+            prompt_tokens = estimate_tokens([m.get("content") or "" for m in messages])
+            failure = self._inject("chat", prompt_tokens)
+            if failure:
+                return failure
+            content = self._completion_content(messages)
+            completion_tokens = estimate_tokens(content)
+            self._count("chat", requests=1, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+            return 200, {
+                "id": f"chatcmpl-mock-{int(time.time() * 1000)}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "mock"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                },
+            }
+
+        if method == "POST" and path == "/embeddings":
+            inputs = body.get("input", [])
+            if isinstance(inputs, str) or (inputs and isinstance(inputs[0], int)):
+                inputs = [inputs]
+            prompt_tokens = sum(estimate_tokens(item) for item in inputs)
+            failure = self._inject("embeddings", prompt_tokens)
+            if failure:
+                return failure
+            data = []
+            for i, item in enumerate(inputs):
+                vector = self._embed(item)
+                if body.get("encoding_format") == "base64":
+                    vector = base64.b64encode(vector.astype("<f4").tobytes()).decode("ascii")
+                else:
+                    vector = vector.tolist()
+                data.append({"object": "embedding", "index": i, "embedding": vector})
+            self._count("embeddings", requests=1, prompt_tokens=prompt_tokens)
+            return 200, {
+                "object": "list",
+                "data": data,
+                "model": body.get("model", "mock"),
+                "usage": {"prompt_tokens": prompt_tokens, "total_tokens": prompt_tokens},
+            }
+
+        return 404, {"error": {"message": f"Unknown endpoint {method} {path}"}}
+
+
+class MockPineconeServer(_MockServer):
+    """
+    Mock of the Pinecone control and data plane, served from a single address.
+
+    Indexes are held in memory; queries are exact cosine scans per namespace.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.indexes: Dict[str, Dict[str, Any]] = {}
+        # index host -> namespace -> id -> (values, metadata); this server hosts one data plane
+        self.vectors: Dict[str, Dict[str, Tuple[List[float], Dict[str, Any]]]] = {}
+        self._data_lock = threading.Lock()
+
+    def _describe(self, name: str) -> Dict[str, Any]:
+        index = self.indexes[name]
+        return {
+            "name": name,
+            "dimension": index["dimension"],
+            "metric": index["metric"],
+            "host": self.url,
+            "spec": index["spec"],
+            "status": {"ready": True, "state": "Ready"},
+            "vector_type": "dense",
+            "deletion_protection": "disabled",
+        }
+
+    def route(self, method: str, path: str, body: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        if method == "GET" and path == "/mock/stats":
+            return 200, self.snapshot()
+
+        # Control plane
+        if path == "/indexes":
+            failure = self._inject("control")
+            if failure:
+                return failure
+            self._count("control", requests=1)
+            if method == "GET":
+                return 200, {"indexes": [self._describe(name) for name in self.indexes]}
+            if method == "POST":
+                name = body["name"]
+                if name in self.indexes:
+                    return 409, {"error": {"code": "ALREADY_EXISTS", "message": f"Resource {name} already exists"}, "status": 409}
+                self.indexes[name] = {
+                    "dimension": body.get("dimension", 1536),
+                    "metric": body.get("metric", "cosine"),
+                    "spec": body.get("spec") or {"serverless": {"cloud": "aws", "region": "us-east-1"}},
+                }
+                return 201, self._describe(name)
+        if path.startswith("/indexes/"):
+            failure = self._inject("control")
+            if failure:
+                return failure
+            self._count("control", requests=1)
+            name = path.split("/")[2]
+            if name not in self.indexes:
+                return 404, {"error": {"code": "NOT_FOUND", "message": f"Resource {name} not found"}, "status": 404}
+            if method == "DELETE":
+                del self.indexes[name]
+                return 202, {}
+            return 200, self._describe(name)
+
+        # Data plane
+        namespace = body.get("namespace", "")
+        if method == "POST" and path == "/vectors/upsert":
+            vectors = body.get("vectors", [])
+            failure = self._inject("upsert")
+            if failure:
+                return failure
+            with self._data_lock:
+                store = self.vectors.setdefault(namespace, {})
+                for vector in vectors:
+                    store[vector["id"]] = (vector.get("values", []), vector.get("metadata") or {})
+            self._count("upsert", requests=1)
+            return 200, {"upsertedCount": len(vectors)}
+
+        if method == "POST" and path == "/query":
+            failure = self._inject("query")
+            if failure:
+                return failure
+            query = np.asarray(body.get("vector") or [], dtype=np.float32)
+            top_k = int(body.get("topK", 10))
+            with self._data_lock:
+                items = list(self.vectors.get(namespace, {}).items())
+            matches = []
+            if items and query.size:
+                matrix = np.asarray([values for _, (values, _) in items], dtype=np.float32)
+                norms = np.linalg.norm(matrix, axis=1) * (np.linalg.norm(query) or 1.0)
+                scores = matrix @ query / np.where(norms == 0, 1.0, norms)
+                for position in np.argsort(-scores)[:top_k]:
+                    vector_id, (values, metadata) = items[position]
+                    match = {"id": vector_id, "score": float(scores[position])}
+                    if body.get("includeValues"):
+                        match["values"] = values
+                    if body.get("includeMetadata"):
+                        match["metadata"] = metadata
+                    matches.append(match)
+            self._count("query", requests=1)
+            return 200, {"matches": matches, "namespace": namespace, "usage": {"readUnits": 1}}
+
+        if method == "GET" and path == "/vectors/list":
+            failure = self._inject("list")
+            if failure:
+                return failure
+            limit = int(body.get("limit") or 100)
+            offset = int(body.get("paginationToken") or 0)
+            with self._data_lock:
+                ids = sorted(self.vectors.get(namespace, {}))
+            page = ids[offset:offset + limit]
+            self._count("list", requests=1)
+            response = {"vectors": [{"id": vector_id} for vector_id in page], "namespace": namespace, "usage": {"readUnits": 1}}
+            if offset + limit < len(ids):
+                response["pagination"] = {"next": str(offset + limit)}
+            return 200, response
+
+        if method == "GET" and path == "/vectors/fetch":
+            failure = self._inject("fetch")
+            if failure:
+                return failure
+            with self._data_lock:
+                store = self.vectors.get(namespace, {})
+                found = {
+                    vector_id: {"id": vector_id, "values": store[vector_id][0], "metadata": store[vector_id][1]}
+                    for vector_id in body.get("ids", []) if vector_id in store
+                }
+            self._count("fetch", requests=1)
+            return 200, {"vectors": found, "namespace": namespace, "usage": {"readUnits": 1}}
+
+        if method in ("POST", "GET") and path == "/describe_index_stats":
+            failure = self._inject("stats")
+            if failure:
+                return failure
+            with self._data_lock:
+                namespaces = {ns: {"vectorCount": len(store)} for ns, store in self.vectors.items()}
+            self._count("stats", requests=1)
+            return 200, {
+                "namespaces": namespaces,
+                "dimension": next(iter(self.indexes.values()), {}).get("dimension", 1536),
+                "indexFullness": 0.0,
+                "totalVectorCount": sum(ns["vectorCount"] for ns in namespaces.values()),
+            }
+
+        if method == "POST" and path == "/vectors/delete":
+            failure = self._inject("delete")
+            if failure:
+                return failure
+            with self._data_lock:
+                if body.get("deleteAll"):
+                    if namespace not in self.vectors:
+                        return 404, {"code": 5, "message": "Namespace not found", "details": []}
+                    del self.vectors[namespace]
+                else:
+                    store = self.vectors.get(namespace, {})
+                    for vector_id in body.get("ids", []):
+                        store.pop(vector_id, None)
+            self._count("delete", requests=1)
+            return 200, {}
+
+        return 404, {"error": {"message": f"Unknown endpoint {method} {path}"}}
+
+
+def serve(
+    openai_port: int = 0,
+    pinecone_port: int = 0,
+    latency: Optional[Dict[str, LatencyDistribution]] = None,
+    error_rate: float = 0.0,
+    rate_limit_rate: float = 0.0,
+    tokens_per_minute: Optional[int] = None,
+    seed: Optional[int] = None,
+    ready=None,
+):
+    """
+    Run both mock servers until interrupted.
+
+    If ``ready`` (a multiprocessing connection) is given, the two base URLs are sent
+    through it once the servers are listening.
+    """
+    options = dict(
+        latency=latency, error_rate=error_rate, rate_limit_rate=rate_limit_rate,
+        tokens_per_minute=tokens_per_minute, seed=seed,
+    )
+    openai_server = MockOpenAIServer(port=openai_port, **options).start()
+    pinecone_server = MockPineconeServer(port=pinecone_port, **options).start()
+    print(f"Mock OpenAI API listening on {openai_server.url}/v1")
+    print(f"Mock Pinecone API listening on {pinecone_server.url}")
+    if ready is not None:
+        ready.send((openai_server.url, pinecone_server.url))
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        openai_server.stop()
+        pinecone_server.stop()
+
+
+def parse_latency_specs(specs: List[str]) -> Dict[str, LatencyDistribution]:
+    """Parse "endpoint=spec" pairs (or a bare spec for the default) into distributions."""
+    latency = {}
+    for spec in specs or []:
+        endpoint, sep, distribution = spec.partition("=")
+        if not sep or ":" in endpoint:
+            endpoint, distribution = "default", spec
+        latency[endpoint] = LatencyDistribution.parse(distribution)
+    return latency
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run local mock OpenAI and Pinecone servers.")
+    parser.add_argument("--openai-port", type=int, default=8001)
+    parser.add_argument("--pinecone-port", type=int, default=8002)
+    parser.add_argument(
+        "--latency", action="append", default=[],
+        help='Latency distribution, e.g. "lognormal:median_ms=400,sigma=0.5" or per endpoint '
+             '"chat=uniform:low_ms=200,high_ms=900" (endpoints: chat, embeddings, control, upsert, query, stats, delete)',
+    )
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 429")
+    parser.add_argument("--tokens-per-minute", type=int, default=None, help="Return 429 once this many tokens per minute are exceeded")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    serve(
+        openai_port=args.openai_port,
+        pinecone_port=args.pinecone_port,
+        latency=parse_latency_specs(args.latency),
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        tokens_per_minute=args.tokens_per_minute,
+        seed=args.seed,
+    )
+
+
+if __name__ == "__main__":
+    main()
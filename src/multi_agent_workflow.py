@@ -1,3 +1,4 @@
+import sqlite3
 from typing import Dict, List, Any, Optional
 from pydantic import BaseModel, Field  # Use BaseModel from pydantic (v2 required by langchain)
 from langchain.schema import Document
@@ -7,15 +8,26 @@ from src.document_processor import DocumentProcessor
 from src.data_extractor import DataExtractor
 from src.vector_db_manager import VectorDBManager
 from src.data_analysis_agent import DataAnalysisAgent
+from src.results_store import ResultsStore
+from src.profiling import StageProfiler
 
 class MultiAgentWorkflow:
     """Coordinates the multi-agent workflow using LangGraph."""
     
-    def __init__(self, openai_api_key: str, pinecone_api_key: str):
+    def __init__(
+        self,
+        openai_api_key: str,
+        pinecone_api_key: str,
+        results_store: Optional[ResultsStore] = None,
+        session_id: Optional[str] = None
+    ):
         self.document_processor = DocumentProcessor()
         self.data_extractor = DataExtractor()
-        self.vector_db_manager = VectorDBManager(api_key=pinecone_api_key)
+        self.vector_db_manager = VectorDBManager(api_key=pinecone_api_key, session_id=session_id)
         self.data_analyzer = DataAnalysisAgent()
+        self.results_store = results_store
+        # Opt-in per-stage profiling (PIPELINE_PROFILE=1); None means nodes run unwrapped
+        self.profiler = StageProfiler.from_env()
         
         # Initialize the LangGraph workflow
         self._build_workflow()
@@ -35,7 +47,9 @@ class MultiAgentWorkflow:
         
         def process_documents(state: WorkflowState) -> WorkflowState:
             try:
-                state.documents = self.document_processor.extract_from_multiple_files(state.files)
+                state.documents = self.document_processor.extract_from_multiple_files(
+                    state.files, profiler=self.profiler
+                )
                 state.current_status = "documents_processed"
             except Exception as e:
                 state.error = f"Error processing documents: {str(e)}"
@@ -95,12 +109,18 @@ class MultiAgentWorkflow:
         
         # Create the workflow graph using the StateGraph wrapper
         workflow = StateGraph(WorkflowState)
-        workflow.add_node("process_documents", process_documents)
-        workflow.add_node("chunk_documents", chunk_documents)
-        workflow.add_node("store_in_vector_db", store_in_vector_db)
-        workflow.add_node("extract_data", extract_data)
-        workflow.add_node("analyze_data", analyze_data)
-        workflow.add_node("generate_summary", generate_summary)
+        nodes = {
+            "process_documents": process_documents,
+            "chunk_documents": chunk_documents,
+            "store_in_vector_db": store_in_vector_db,
+            "extract_data": extract_data,
+            "analyze_data": analyze_data,
+            "generate_summary": generate_summary,
+        }
+        for name, node in nodes.items():
+            if self.profiler is not None:
+                node = self.profiler.wrap(name, node)
+            workflow.add_node(name, node)
         
         workflow.add_edge("process_documents", "chunk_documents")
         workflow.add_edge("chunk_documents", "store_in_vector_db")
@@ -114,6 +134,18 @@ class MultiAgentWorkflow:
     
     def run(self, file_paths: List[str]) -> Dict[str, Any]:
         """Run the multi-agent workflow on the provided files."""
+        try:
+            corpus_fingerprint = self.document_processor.fingerprint_files(file_paths)
+        except OSError:
+            corpus_fingerprint = None
+
+        if corpus_fingerprint is not None:
+            # Scope storage and retrieval to this corpus' namespace
+            self.vector_db_manager.activate_corpus(corpus_fingerprint)
+
+        if self.profiler is not None:
+            self.profiler.start_run()
+
         initial_state = {"files": file_paths}
         final_state = self.graph.invoke(initial_state)
 
@@ -128,11 +160,23 @@ class MultiAgentWorkflow:
                 "current_stage": final_state.get("current_status")
             }
         else:
-            return {
+            results = {
                 "status": "success",
                 "quantitative_data": final_state.get("quantitative_data"),
                 "qualitative_data": final_state.get("qualitative_data"),
                 "analysis": final_state.get("analysis"),
-                "summary": final_state.get("summary")
+                "summary": final_state.get("summary"),
+                "corpus_fingerprint": corpus_fingerprint
             }
+            if self.profiler is not None:
+                results["profile_dir"] = self.profiler.run_dir
+            if self.results_store is not None:
+                try:
+                    results["run_id"] = self.results_store.save_run(
+                        results, file_paths, corpus_fingerprint=corpus_fingerprint
+                    )
+                except sqlite3.Error as e:
+                    # The pipeline succeeded; don't lose its results because they couldn't be persisted
+                    print(f"Error saving run to results store: {str(e)}")
+            return results
 
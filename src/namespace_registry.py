@@ -0,0 +1,189 @@
+import os
+import time
+import sqlite3
+from contextlib import contextmanager
+from typing import Dict, List, Any, Optional, Tuple
+
+DEFAULT_REGISTRY_DB = os.path.join("results", "namespaces.db")
+DEFAULT_NAMESPACE_TTL_HOURS = 24.0
+
+
+class NamespaceRegistry:
+    """Tracks Pinecone namespaces per corpus/session so stale ones can be garbage collected."""
+
+    def __init__(self, db_path: Optional[str] = None, default_ttl_seconds: Optional[float] = None):
+        self.db_path = db_path or os.getenv("NAMESPACE_REGISTRY_PATH", DEFAULT_REGISTRY_DB)
+        if default_ttl_seconds is None:
+            default_ttl_seconds = float(os.getenv("NAMESPACE_TTL_HOURS", DEFAULT_NAMESPACE_TTL_HOURS)) * 3600
+        self.default_ttl_seconds = default_ttl_seconds
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._initialize_schema()
+
+    @contextmanager
+    def _connect(self):
+        """Open a connection that commits on success and is always closed."""
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _initialize_schema(self):
+        """Create the registry table if it doesn't exist."""
+        with self._connect() as conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS namespaces (
+                    name TEXT NOT NULL,
+                    index_name TEXT NOT NULL,
+                    session_id TEXT,
+                    corpus_fingerprint TEXT,
+                    document_count INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    last_used_at REAL NOT NULL,
+                    ttl_seconds REAL NOT NULL,
+                    PRIMARY KEY (index_name, name)
+                );
+                CREATE INDEX IF NOT EXISTS idx_namespaces_expiry ON namespaces(index_name, last_used_at);
+                """
+            )
+
+    def register(
+        self,
+        name: str,
+        index_name: str,
+        session_id: Optional[str] = None,
+        corpus_fingerprint: Optional[str] = None,
+        ttl_seconds: Optional[float] = None,
+    ):
+        """Register a namespace, or refresh its last-used time if it already exists."""
+        now = time.time()
+        ttl = self.default_ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._connect() as conn:
+            conn.execute(
+                """
+                INSERT INTO namespaces (name, index_name, session_id, corpus_fingerprint,
+                                        created_at, last_used_at, ttl_seconds)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(index_name, name) DO UPDATE SET
+                    last_used_at = excluded.last_used_at,
+                    ttl_seconds = excluded.ttl_seconds
+                """,
+                (name, index_name, session_id, corpus_fingerprint, now, now, ttl),
+            )
+
+    def touch(self, name: str, index_name: str):
+        """Mark a namespace as used now, extending its TTL."""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE namespaces SET last_used_at = ? WHERE index_name = ? AND name = ?",
+                (time.time(), index_name, name),
+            )
+
+    def record_documents(self, name: str, index_name: str, document_count: int):
+        """Record how many chunks have been stored in a namespace."""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE namespaces SET document_count = ?, last_used_at = ? WHERE index_name = ? AND name = ?",
+                (document_count, time.time(), index_name, name),
+            )
+
+    def get(self, name: str, index_name: str) -> Optional[Dict[str, Any]]:
+        """Return the registry entry for a namespace, if any."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM namespaces WHERE index_name = ? AND name = ?", (index_name, name)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def list_namespaces(self, index_name: str) -> List[Dict[str, Any]]:
+        """List all registered namespaces of an index."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM namespaces WHERE index_name = ? ORDER BY last_used_at DESC", (index_name,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def expired(self, index_name: str, now: Optional[float] = None) -> List[str]:
+        """Names of namespaces whose TTL has elapsed since they were last used."""
+        now = time.time() if now is None else now
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT name FROM namespaces WHERE index_name = ? AND last_used_at + ttl_seconds < ?",
+                (index_name, now),
+            ).fetchall()
+        return [row["name"] for row in rows]
+
+    def remove(self, name: str, index_name: str):
+        """Forget a namespace."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM namespaces WHERE index_name = ? AND name = ?", (index_name, name))
+
+    def collect_garbage(
+        self,
+        index,
+        index_name: str,
+        keep: Optional[List[str]] = None,
+        prefixes: Optional[Tuple[str, ...]] = None,
+    ) -> List[str]:
+        """
+        Delete the vectors of every expired namespace from the Pinecone index.
+
+        Namespaces listed in ``keep`` (e.g. the caller's active one) are never deleted,
+        and when ``prefixes`` is given only namespaces starting with one of them are.
+        Returns the names of the namespaces that were removed.
+        """
+        keep = set(keep or [])
+        removed = []
+        for name in self.expired(index_name):
+            if name in keep or (prefixes and not name.startswith(prefixes)):
+                continue
+            try:
+                index.delete(delete_all=True, namespace=name)
+            except Exception as e:
+                # Namespaces that were never populated don't exist in Pinecone
+                if "not found" not in str(e).lower() and "404" not in str(e):
+                    print(f"Error deleting namespace {name}: {str(e)}")
+                    continue
+            self.remove(name, index_name)
+            removed.append(name)
+        if removed:
+            print(f"Garbage collected {len(removed)} stale namespace(s) from {index_name}")
+        return removed
+
+    def report(self, index, index_name: str, dimension: int) -> List[Dict[str, Any]]:
+        """
+        Report vector counts and estimated size per namespace.
+
+        Counts come from the index stats; size is estimated as float32 values only
+        (metadata is not included). Namespaces present in the index but unknown to the
+        registry are reported with ``registered`` set to False.
+        """
+        stats = index.describe_index_stats()
+        live = {name: summary.vector_count for name, summary in (stats.namespaces or {}).items()}
+        entries = {entry["name"]: entry for entry in self.list_namespaces(index_name)}
+        now = time.time()
+
+        report = []
+        for name in sorted(set(live) | set(entries)):
+            entry = entries.get(name)
+            vector_count = live.get(name, 0)
+            row = {
+                "namespace": name,
+                "registered": entry is not None,
+                "vector_count": vector_count,
+                "estimated_bytes": vector_count * dimension * 4,
+            }
+            if entry is not None:
+                row.update({
+                    "session_id": entry["session_id"],
+                    "corpus_fingerprint": entry["corpus_fingerprint"],
+                    "idle_seconds": round(now - entry["last_used_at"], 1),
+                    "expires_in_seconds": round(entry["last_used_at"] + entry["ttl_seconds"] - now, 1),
+                })
+            report.append(row)
+        return report
@@ -0,0 +1,236 @@
+import os
+import json
+import time
+import pstats
+import cProfile
+import threading
+import tracemalloc
+from datetime import datetime
+from functools import wraps
+from typing import Dict, List, Any, Callable, Optional
+
+PROFILE_ENV_VAR = "PIPELINE_PROFILE"
+PROFILE_DIR_ENV_VAR = "PIPELINE_PROFILE_DIR"
+PROFILE_LOADERS_ENV_VAR = "PIPELINE_PROFILE_LOADERS"
+DEFAULT_PROFILE_DIR = "profiles"
+
+# tracemalloc is process-global, so it is shared by every profiler and thread: it is
+# started with the first active outermost stage and stopped with the last one, and
+# its peak is only reset when no other stage is being traced.
+_tracing_lock = threading.Lock()
+_active_stages = 0
+_stages_started = 0
+_owns_tracing = False
+
+
+def _env_flag(name: str) -> bool:
+    return os.getenv(name, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def _begin_traced_stage() -> int:
+    """Register an outermost stage with tracemalloc; returns a token for _end_traced_stage."""
+    global _active_stages, _stages_started, _owns_tracing
+    with _tracing_lock:
+        if _active_stages == 0:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                _owns_tracing = True
+            tracemalloc.reset_peak()
+        _active_stages += 1
+        _stages_started += 1
+        # 0 marks a stage that started while another was already being traced
+        return _stages_started if _active_stages == 1 else 0
+
+
+def _end_traced_stage(token: int) -> bool:
+    """Unregister an outermost stage; returns whether it ran without any concurrent stage."""
+    global _active_stages, _owns_tracing
+    with _tracing_lock:
+        alone = token != 0 and token == _stages_started
+        _active_stages -= 1
+        if _active_stages == 0 and _owns_tracing:
+            tracemalloc.stop()
+            _owns_tracing = False
+        return alone
+
+
+def _format_frame(func: tuple) -> str:
+    """Render a pstats function key as a single flamegraph frame."""
+    file_name, line, name = func
+    if file_name == "~":
+        return name.replace(";", ":")
+    return f"{name} ({os.path.basename(file_name)}:{line})".replace(";", ":")
+
+
+def collapse_stats(stats: pstats.Stats, max_depth: int = 64, min_time: float = 1e-6,
+                   min_fraction: float = 1e-4) -> List[str]:
+    """
+    Convert cProfile stats into collapsed-stack lines ("a;b;c <microseconds>").
+
+    cProfile only records caller/callee edges, so full stacks are reconstructed by
+    walking the call graph from its roots and splitting each function's time across
+    its callers in proportion to the cumulative time recorded for every edge. Paths
+    contributing less than ``min_time`` seconds, or less than ``min_fraction`` of the
+    total profiled time, are pruned to keep the walk and the output bounded.
+    """
+    raw = stats.stats
+    min_time = max(min_time, min_fraction * sum(entry[2] for entry in raw.values()))
+    callees: Dict[tuple, List[tuple]] = {}
+    for func, (_, _, _, _, callers) in raw.items():
+        for caller in callers:
+            callees.setdefault(caller, []).append(func)
+
+    totals: Dict[str, float] = {}
+
+    def walk(func: tuple, stack: List[str], share: float):
+        _, _, tottime, cumtime, _ = raw[func]
+        frame_stack = stack + [_format_frame(func)]
+        key = ";".join(frame_stack)
+        totals[key] = totals.get(key, 0.0) + tottime * share
+        if len(frame_stack) >= max_depth or cumtime <= 0:
+            return
+        for callee in callees.get(func, []):
+            if _format_frame(callee) in frame_stack:
+                continue  # recursion; its time is already attributed to the outer frame
+            edge_cumtime = raw[callee][4][func][3]
+            callee_cumtime = raw[callee][3]
+            if share * edge_cumtime < min_time:
+                continue
+            walk(callee, frame_stack, share * edge_cumtime / callee_cumtime)
+
+    roots = [func for func, (_, _, _, _, callers) in raw.items() if not callers]
+    for root in roots:
+        walk(root, [], 1.0)
+
+    return [f"{key} {int(value * 1e6)}" for key, value in totals.items() if int(value * 1e6) > 0]
+
+
+class StageProfiler:
+    """
+    Opt-in CPU and memory profiler for pipeline stages.
+
+    Each wrapped stage gets its own cProfile stats (``.prof``), a collapsed-stack file
+    for flamegraph tools (``.collapsed``) and a tracemalloc report of peak usage and
+    top allocators (``.memory.txt``). A ``summary.json`` for the whole run is kept up to
+    date in the run directory. Stages nested inside another profiled stage (e.g.
+    document loaders inside ``process_documents``) get their own CPU profile: the
+    enclosing stage's profiler is paused while they run, so their calls appear only in
+    their own profile. The nested stage's snapshots and report writing happen while
+    no profiler is running, and that time is subtracted from the enclosing stage's
+    wall time. Calls the enclosing stage makes after a nested stage returns are recorded
+    without their enclosing frames. Peak memory is reported for outermost stages only.
+
+    tracemalloc traces the whole process, so when profiled stages of other runs (e.g.
+    other Streamlit sessions) overlap, memory figures include their allocations; such
+    stages are marked ``concurrent`` and their peak is not reported.
+    """
+
+    def __init__(self, output_dir: str = DEFAULT_PROFILE_DIR, profile_loaders: bool = False, top_allocators: int = 15):
+        self.output_dir = output_dir
+        self.profile_loaders = profile_loaders
+        self.top_allocators = top_allocators
+        # Active stages, innermost last: {"profiler": cProfile.Profile, "overhead": seconds}
+        self._stack: List[Dict[str, Any]] = []
+        self.run_dir: Optional[str] = None
+        self.stages: List[Dict[str, Any]] = []
+
+    def start_run(self):
+        """Start a fresh run directory; subsequent stages are written into it."""
+        self.run_dir = os.path.join(self.output_dir, datetime.now().strftime("%Y%m%d-%H%M%S-%f"))
+        self.stages = []
+        os.makedirs(self.run_dir, exist_ok=True)
+
+    @classmethod
+    def from_env(cls) -> Optional["StageProfiler"]:
+        """Return a profiler if PIPELINE_PROFILE is enabled, otherwise None."""
+        if not _env_flag(PROFILE_ENV_VAR):
+            return None
+        return cls(
+            output_dir=os.getenv(PROFILE_DIR_ENV_VAR, DEFAULT_PROFILE_DIR),
+            profile_loaders=_env_flag(PROFILE_LOADERS_ENV_VAR),
+        )
+
+    def wrap(self, stage_name: str, func: Callable) -> Callable:
+        """Wrap a callable so every invocation is profiled as a stage."""
+        @wraps(func)
+        def profiled(*args, **kwargs):
+            return self.profile_call(stage_name, func, *args, **kwargs)
+        return profiled
+
+    def profile_call(self, stage_name: str, func: Callable, *args, **kwargs):
+        """Run func under the profiler and write its reports."""
+        bookkeeping_start = time.perf_counter()
+        parent = self._stack[-1] if self._stack else None
+        if parent is not None:
+            parent["profiler"].disable()
+        outermost = parent is None
+        token = _begin_traced_stage() if outermost else None
+        before_snapshot = tracemalloc.take_snapshot()
+        before_current, _ = tracemalloc.get_traced_memory()
+
+        frame = {"profiler": cProfile.Profile(), "overhead": 0.0}
+        self._stack.append(frame)
+        start = time.perf_counter()
+        if parent is not None:
+            parent["overhead"] += start - bookkeeping_start
+        frame["profiler"].enable()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            frame["profiler"].disable()
+            end = time.perf_counter()
+            elapsed = end - start - frame["overhead"]
+            self._stack.pop()
+            after_current, peak = tracemalloc.get_traced_memory()
+            after_snapshot = tracemalloc.take_snapshot()
+            alone = _end_traced_stage(token) if outermost else None
+            self._write_stage(
+                stage_name, elapsed, frame["profiler"], before_snapshot, after_snapshot,
+                after_current - before_current, peak if alone else None, concurrent=alone is False,
+            )
+            if parent is not None:
+                parent["overhead"] += time.perf_counter() - end
+                parent["profiler"].enable()
+
+    def _write_stage(self, stage_name, elapsed, profiler, before_snapshot, after_snapshot, memory_delta, peak,
+                     concurrent=False):
+        if self.run_dir is None:
+            self.start_run()
+        index = len(self.stages) + 1
+        safe_name = "".join(c if c.isalnum() or c in "-_" else "_" for c in stage_name)
+        base = os.path.join(self.run_dir, f"{index:02d}_{safe_name}")
+        stage: Dict[str, Any] = {
+            "stage": stage_name,
+            "wall_time_s": round(elapsed, 6),
+            "memory_delta_bytes": memory_delta,
+        }
+
+        stats = pstats.Stats(profiler)
+        stats.dump_stats(f"{base}.prof")
+        with open(f"{base}.collapsed", "w") as f:
+            f.write("\n".join(collapse_stats(stats)) + "\n")
+        stage["cpu_profile"] = f"{base}.prof"
+        stage["collapsed_stacks"] = f"{base}.collapsed"
+        if peak is not None:
+            stage["peak_memory_bytes"] = peak
+        if concurrent:
+            stage["concurrent"] = True
+
+        top_stats = after_snapshot.compare_to(before_snapshot, "lineno")[: self.top_allocators]
+        with open(f"{base}.memory.txt", "w") as f:
+            f.write(f"stage: {stage_name}\n")
+            f.write(f"wall time: {elapsed:.3f}s\n")
+            f.write(f"memory delta: {memory_delta / 1024:.1f} KiB\n")
+            if peak is not None:
+                f.write(f"peak traced memory: {peak / 1024:.1f} KiB\n")
+            if concurrent:
+                f.write("other profiled stages ran concurrently: memory figures are process-wide, peak not reported\n")
+            f.write(f"\ntop {self.top_allocators} allocators (net since stage start):\n")
+            for stat in top_stats:
+                f.write(f"{stat}\n")
+        stage["memory_report"] = f"{base}.memory.txt"
+
+        self.stages.append(stage)
+        with open(os.path.join(self.run_dir, "summary.json"), "w") as f:
+            json.dump({"stages": self.stages}, f, indent=2)
+        print(f"Profiled stage '{stage_name}' in {elapsed:.2f}s -> {base}.*")
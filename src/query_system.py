@@ -23,6 +23,7 @@ class QuerySystem:
     
     def ask(self, question: str) -> str:
         """Ask a question about the processed data."""
+        self.vector_db_manager.touch()
         return self.qa_chain.run(question)
     
     def create_interactive_agent(self) -> AgentExecutor:
@@ -0,0 +1,219 @@
+import os
+import json
+import math
+import uuid
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, List, Any, Optional
+
+from src.data_extractor import DataExtractor
+
+DEFAULT_RESULTS_DB = os.path.join("results", "runs.db")
+
+
+class ResultsStore:
+    """Persists workflow outputs in SQLite so past runs can be reopened without re-running the pipeline."""
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or os.getenv("RESULTS_DB_PATH", DEFAULT_RESULTS_DB)
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._initialize_schema()
+
+    @contextmanager
+    def _connect(self):
+        """Open a connection that commits on success and is always closed."""
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _initialize_schema(self):
+        """Create tables and indexes if they don't exist."""
+        with self._connect() as conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS runs (
+                    run_id TEXT PRIMARY KEY,
+                    created_at TEXT NOT NULL,
+                    corpus_fingerprint TEXT,
+                    files TEXT NOT NULL,
+                    quantitative_data TEXT NOT NULL,
+                    qualitative_data TEXT NOT NULL,
+                    analysis TEXT NOT NULL,
+                    summary TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS metrics (
+                    run_id TEXT NOT NULL,
+                    source TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    value REAL,
+                    value_text TEXT
+                );
+                CREATE INDEX IF NOT EXISTS idx_runs_fingerprint ON runs(corpus_fingerprint);
+                CREATE INDEX IF NOT EXISTS idx_runs_created_at ON runs(created_at);
+                CREATE INDEX IF NOT EXISTS idx_metrics_name ON metrics(name, run_id);
+                CREATE INDEX IF NOT EXISTS idx_metrics_source ON metrics(source, run_id);
+                CREATE INDEX IF NOT EXISTS idx_metrics_run ON metrics(run_id);
+                """
+            )
+
+    @staticmethod
+    def _to_number(value: Any) -> Optional[float]:
+        if isinstance(value, bool):
+            return None
+        try:
+            number = float(value) if isinstance(value, (int, float)) else float(str(value).replace(",", ""))
+        except (TypeError, ValueError):
+            return None
+        return number if math.isfinite(number) else None
+
+    def save_run(
+        self,
+        results: Dict[str, Any],
+        files: List[str],
+        corpus_fingerprint: Optional[str] = None,
+        run_id: Optional[str] = None,
+    ) -> str:
+        """Store the outputs of a successful workflow run and return its run id."""
+        run_id = run_id or uuid.uuid4().hex
+        quantitative_data = results.get("quantitative_data") or {}
+        created_at = datetime.now(timezone.utc).isoformat()
+
+        metric_rows = []
+        for source, name, value in DataExtractor.flatten_quantitative_data(quantitative_data):
+            number = self._to_number(value)
+            text = None if number is not None else json.dumps(value)
+            metric_rows.append((run_id, source, name, number, text))
+
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    run_id,
+                    created_at,
+                    corpus_fingerprint,
+                    json.dumps([os.path.basename(f) for f in files]),
+                    json.dumps(quantitative_data),
+                    json.dumps(results.get("qualitative_data") or {}),
+                    json.dumps(results.get("analysis") or {}),
+                    results.get("summary") or "",
+                ),
+            )
+            conn.executemany("INSERT INTO metrics VALUES (?, ?, ?, ?, ?)", metric_rows)
+        return run_id
+
+    def list_runs(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """List the most recent runs (metadata only)."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                """
+                SELECT r.run_id, r.created_at, r.corpus_fingerprint, r.files,
+                       (SELECT COUNT(*) FROM metrics m WHERE m.run_id = r.run_id) AS metric_count
+                FROM runs r ORDER BY r.created_at DESC LIMIT ?
+                """,
+                (limit,),
+            ).fetchall()
+        return [
+            {
+                "run_id": row["run_id"],
+                "created_at": row["created_at"],
+                "corpus_fingerprint": row["corpus_fingerprint"],
+                "files": json.loads(row["files"]),
+                "metric_count": row["metric_count"],
+            }
+            for row in rows
+        ]
+
+    def find_runs_by_fingerprint(self, corpus_fingerprint: str) -> List[str]:
+        """Return ids of runs over the same corpus, newest first."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT run_id FROM runs WHERE corpus_fingerprint = ? ORDER BY created_at DESC",
+                (corpus_fingerprint,),
+            ).fetchall()
+        return [row["run_id"] for row in rows]
+
+    def load_run(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """Load a past run in the same shape as `MultiAgentWorkflow.run` returns."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        if row is None:
+            return None
+        return {
+            "status": "success",
+            "run_id": row["run_id"],
+            "created_at": row["created_at"],
+            "corpus_fingerprint": row["corpus_fingerprint"],
+            "files": json.loads(row["files"]),
+            "quantitative_data": json.loads(row["quantitative_data"]),
+            "qualitative_data": json.loads(row["qualitative_data"]),
+            "analysis": json.loads(row["analysis"]),
+            "summary": row["summary"],
+        }
+
+    def query_metrics(
+        self,
+        name: Optional[str] = None,
+        source: Optional[str] = None,
+        run_id: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Look up stored metrics by name, source and/or run using the metric indexes."""
+        clauses, params = [], []
+        for column, value in (("name", name), ("source", source), ("run_id", run_id)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT run_id, source, name, value, value_text FROM metrics {where}", params
+            ).fetchall()
+        return [
+            {
+                "run_id": row["run_id"],
+                "source": row["source"],
+                "name": row["name"],
+                "value": row["value"] if row["value"] is not None else json.loads(row["value_text"]),
+            }
+            for row in rows
+        ]
+
+    def compare_metrics(
+        self, run_ids: List[str], names: Optional[List[str]] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Compare metrics across runs.
+
+        Returns a mapping of metric key (``source/name`` or ``name``) to a mapping of
+        run id to value. Metrics missing from a run are absent from its inner mapping.
+        """
+        if not run_ids:
+            return {}
+        params: List[Any] = list(run_ids)
+        where = f"run_id IN ({', '.join('?' for _ in run_ids)})"
+        if names:
+            where += f" AND name IN ({', '.join('?' for _ in names)})"
+            params.extend(names)
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT run_id, source, name, value, value_text FROM metrics WHERE {where}", params
+            ).fetchall()
+
+        comparison: Dict[str, Dict[str, Any]] = {}
+        for row in rows:
+            key = f"{row['source']}/{row['name']}" if row["source"] else row["name"]
+            value = row["value"] if row["value"] is not None else json.loads(row["value_text"])
+            comparison.setdefault(key, {})[row["run_id"]] = value
+        return comparison
+
+    def delete_run(self, run_id: str):
+        """Delete a stored run and its metrics."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM metrics WHERE run_id = ?", (run_id,))
+            conn.execute("DELETE FROM runs WHERE run_id = ?", (run_id,))
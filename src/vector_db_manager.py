@@ -1,19 +1,42 @@
-from typing import List
+from typing import Dict, List, Any, Optional
 
+import numpy as np
 from pinecone import Pinecone, ServerlessSpec
 from langchain_openai import OpenAIEmbeddings  # Updated import for embeddings
 # from langchain_pinecone import Pinecone as LCPinecone  # LangChain integration with Pinecone
 from langchain_pinecone import PineconeVectorStore as LCPinecone  # LangChain integration with Pinecone
 from langchain.schema import Document
 
+from src.namespace_registry import NamespaceRegistry
+from src.embedding_quantizer import QuantizedEmbeddingStore
+
+DEFAULT_NAMESPACE = "document-data"
+# Prefixes of the names produced by namespace_for(); only these are ever garbage collected
+AUTO_NAMESPACE_PREFIXES = ("session-", "corpus-")
+
 class VectorDBManager:
     """Manages the Pinecone vector database for document storage and retrieval."""
     
-    def __init__(self, api_key: str, namespace: str = "document-data", region: str = "us-east-1"):
+    def __init__(
+        self,
+        api_key: str,
+        namespace: Optional[str] = None,
+        region: str = "us-east-1",
+        session_id: Optional[str] = None,
+        namespace_ttl: Optional[float] = None,
+        registry: Optional[NamespaceRegistry] = None,
+    ):
         self.api_key = api_key
-        self.namespace = namespace
+        # Without an explicit namespace, one is derived per corpus/session by activate_corpus()
+        self.auto_namespace = namespace is None
+        self.namespace = namespace or DEFAULT_NAMESPACE
+        self.session_id = session_id
+        self.namespace_ttl = namespace_ttl
+        self.registry = registry or NamespaceRegistry()
         self.index_name = "multi-agent-data"
         self.dimension = 1536  # OpenAI embedding dimension
+        self.quantized_cache: Optional[QuantizedEmbeddingStore] = None
+        self._cached_documents: Dict[str, Document] = {}
         
         # Initialize embedding model
         self.embedding_model = OpenAIEmbeddings()
@@ -43,8 +66,65 @@ class VectorDBManager:
             )
             print(f"Created new Pinecone index: {self.index_name}")
     
+    @staticmethod
+    def namespace_for(corpus_fingerprint: str, session_id: Optional[str] = None) -> str:
+        """Derive a namespace name for a corpus, scoped to a session if one is given."""
+        if session_id:
+            return f"session-{session_id[:12]}-{corpus_fingerprint[:16]}"
+        return f"corpus-{corpus_fingerprint[:16]}"
+
+    def activate_corpus(self, corpus_fingerprint: str) -> str:
+        """
+        Switch to the namespace of the given corpus and collect stale namespaces.
+
+        Has no effect when a namespace was passed explicitly to the constructor: explicit
+        namespaces are never registered for TTL expiry, so they are never garbage collected.
+        """
+        if not self.auto_namespace:
+            return self.namespace
+        self.namespace = self.namespace_for(corpus_fingerprint, self.session_id)
+        self.registry.register(
+            self.namespace,
+            self.index_name,
+            session_id=self.session_id,
+            corpus_fingerprint=corpus_fingerprint,
+            ttl_seconds=self.namespace_ttl,
+        )
+        self.collect_garbage()
+        return self.namespace
+
+    def collect_garbage(self) -> List[str]:
+        """Delete automatically named namespaces whose TTL has expired, never the active one."""
+        return self.registry.collect_garbage(
+            self.index, self.index_name, keep=[self.namespace], prefixes=AUTO_NAMESPACE_PREFIXES
+        )
+
+    def touch(self):
+        """Mark the active namespace as in use so it is not garbage collected."""
+        self.registry.touch(self.namespace, self.index_name)
+
+    def namespace_report(self) -> List[Dict[str, Any]]:
+        """Report vector counts and estimated size for every namespace of the index."""
+        return self.registry.report(self.index, self.index_name, self.dimension)
+
     def store_documents(self, documents: List[Document]):
         """Create embeddings and store documents in Pinecone."""
+        # Only automatically named namespaces are tracked; explicit ones are always appended to
+        entry = self.registry.get(self.namespace, self.index_name) if self.auto_namespace else None
+        if entry and entry["document_count"] == len(documents):
+            # Same corpus already embedded in its namespace; reuse it instead of duplicating vectors
+            self.touch()
+            print(f"Reusing {len(documents)} document chunks already stored in namespace {self.namespace}")
+            return LCPinecone(
+                index_name=self.index_name,
+                embedding=self.embedding_model,
+                namespace=self.namespace
+            )
+
+        if entry and entry["document_count"]:
+            # The corpus was re-chunked differently; replace its vectors rather than mixing them
+            self.index.delete(delete_all=True, namespace=self.namespace)
+
         # Initialize LangChain's Pinecone integration
         vectorstore = LCPinecone.from_documents(
             documents=documents,
@@ -52,11 +132,14 @@ class VectorDBManager:
             index_name=self.index_name,
             namespace=self.namespace
         )
-        print(f"Stored {len(documents)} document chunks in Pinecone")
+        if entry:
+            self.registry.record_documents(self.namespace, self.index_name, len(documents))
+        print(f"Stored {len(documents)} document chunks in Pinecone namespace {self.namespace}")
         return vectorstore
     
     def retrieve_similar(self, query: str, k: int = 5) -> List[Document]:
         """Retrieve similar documents based on a query."""
+        self.touch()
         vectorstore = LCPinecone(
             index_name=self.index_name,
             embedding=self.embedding_model,
@@ -66,9 +149,67 @@ class VectorDBManager:
     
     def create_retriever(self):
         """Create a retriever for use with LangChain."""
+        self.touch()
         vectorstore = LCPinecone(
             index_name=self.index_name,
             embedding=self.embedding_model,
             namespace=self.namespace
         )
         return vectorstore.as_retriever()
+    
+    def _fetch_batches(self, batch_size: int = 100):
+        """Yield (ids, float32 vectors, metadatas) batches for every vector in the active namespace."""
+        for ids in self.index.list(namespace=self.namespace):
+            for start in range(0, len(ids), batch_size):
+                response = self.index.fetch(ids=ids[start:start + batch_size], namespace=self.namespace)
+                vectors = list(response.vectors.values())
+                if vectors:
+                    yield (
+                        [vector.id for vector in vectors],
+                        np.asarray([vector.values for vector in vectors], dtype=np.float32),
+                        [dict(vector.metadata or {}) for vector in vectors],
+                    )
+
+    def build_quantized_cache(self, method: str = "int8", **kwargs) -> Dict[str, Any]:
+        """
+        Build a local quantized cache of the active namespace for fast approximate search and re-ranking.
+
+        The vectors already stored in Pinecone are fetched rather than embedded again,
+        so building the cache costs no embedding calls, and each fetched batch is written
+        straight to the cache's float file so the namespace is never held in memory at
+        once. ``method`` is "int8" (4x smaller) or "pq" (product quantization, 16x smaller
+        by default); extra keyword arguments are passed to QuantizedEmbeddingStore.
+        Returns the cache's memory report.
+        """
+        documents: Dict[str, Document] = {}
+
+        def batches():
+            for ids, vectors, metadatas in self._fetch_batches():
+                for vector_id, metadata in zip(ids, metadatas):
+                    # LangChain keeps the chunk text under the "text" metadata key
+                    documents[vector_id] = Document(page_content=metadata.pop("text", ""), metadata=metadata)
+                yield ids, vectors
+
+        cache = QuantizedEmbeddingStore(method=method, **kwargs)
+        try:
+            cache.build_from_batches(batches())
+        except ValueError:
+            cache.close()
+            if not documents:
+                raise ValueError(f"No vectors stored in namespace {self.namespace}; store documents first")
+            raise
+
+        if self.quantized_cache is not None:
+            self.quantized_cache.close()
+        self.quantized_cache = cache
+        self._cached_documents = documents
+        report = self.quantized_cache.memory_report()
+        print(f"Built {method} embedding cache: {report['vectors']} vectors, {report['compression_ratio']}x smaller than float32")
+        return report
+    
+    def search_quantized(self, query: str, k: int = 5) -> List[Document]:
+        """Retrieve similar documents from the local quantized cache."""
+        if self.quantized_cache is None:
+            raise ValueError("Quantized cache has not been built; call build_quantized_cache first")
+        query_embedding = self.embedding_model.embed_query(query)
+        return [self._cached_documents[vector_id] for vector_id, _ in self.quantized_cache.search(query_embedding, k=k)]
@@ -0,0 +1,88 @@
+from types import SimpleNamespace
+
+from src.data_analysis_agent import DataAnalysisAgent, compact_json
+
+
+class FakeLLM:
+    """Stands in for ChatOpenAI, recording every prompt and answering with a fixed reply."""
+
+    def __init__(self, reply='{"key_findings": []}'):
+        self.reply = reply
+        self.prompts = []
+
+    def invoke(self, messages):
+        self.prompts.append(messages)
+        return SimpleNamespace(content=self.reply)
+
+    def batch(self, prompts, config=None):
+        return [self.invoke(messages) for messages in prompts]
+
+
+def make_agent(token_budget=8000, reply='{"key_findings": []}'):
+    agent = DataAnalysisAgent(llm=FakeLLM(reply), token_budget=token_budget)
+    # Use the character-based estimate so the tests don't depend on tiktoken's download
+    agent._encoding = False
+    return agent
+
+
+def test_pack_splits_oversized_group_whose_parts_only_fit_unwrapped():
+    agent = make_agent()
+    # Two clauses fit the budget together but not once wrapped as {"Contract Terms#1": {...}},
+    # which used to re-split the same part forever
+    clauses = {name: "x" * 15975 for name in ("clause_a", "clause_b", "clause_c")}
+    batches = agent._pack([("Contract Terms", clauses)])
+
+    assert batches == [
+        {"Contract Terms#1": {"clause_a": clauses["clause_a"]}},
+        {"Contract Terms#2": {"clause_b": clauses["clause_b"]}},
+        {"Contract Terms#3": {"clause_c": clauses["clause_c"]}},
+    ]
+    for batch in batches:
+        assert agent._count_tokens(compact_json(batch)) <= agent.token_budget
+
+
+def test_pack_keeps_every_item_within_budget():
+    agent = make_agent(token_budget=200)
+    items = [(f"group_{g}", {f"metric_{g}_{i}": i * 1.5 for i in range(40)}) for g in range(5)]
+    batches = agent._pack(items)
+
+    assert len(batches) > 1
+    packed = {}
+    for batch in batches:
+        assert agent._count_tokens(compact_json(batch)) <= agent.token_budget
+        for part in batch.values():
+            packed.update(part)
+    assert packed == {name: value for _, group in items for name, value in group.items()}
+
+
+def test_hierarchical_analysis_with_oversized_group_completes():
+    agent = make_agent()
+    quantitative = {"Contract Terms": {name: "x" * 15975 for name in ("clause_a", "clause_b", "clause_c")}}
+    analysis = agent.analyze_data(quantitative, {})
+
+    assert analysis == {"key_findings": []}
+    # Three partial analyses plus the final synthesis
+    assert len(agent.llm.prompts) == 4
+
+
+def test_single_and_hierarchical_modes_parse_fenced_json_alike():
+    reply = '```json\n{"key_findings": ["revenue grew"]}\n```'
+    single = make_agent(reply=reply).analyze_data({"revenue": 1}, {}, mode="single")
+    hierarchical = make_agent(token_budget=50, reply=reply).analyze_data(
+        {f"metric_{i}": i for i in range(40)}, {}, mode="hierarchical"
+    )
+
+    assert single == hierarchical == {"key_findings": ["revenue grew"]}
+
+
+def test_unmergeable_partials_are_trimmed_to_budget():
+    agent = make_agent(token_budget=300)
+    partials = {
+        f"part_{i}": {"key_findings": [f"finding {i}.{j} " + "x" * 40 for j in range(20)], "summary": "y" * 200}
+        for i in range(4)
+    }
+    trimmed = agent._trim_to_budget(partials)
+
+    assert agent._count_tokens(compact_json(trimmed)) <= agent.token_budget
+    assert all(part["key_findings"][0] == partials[name]["key_findings"][0] for name, part in trimmed.items())
+    assert len(partials["part_0"]["key_findings"]) == 20  # the input is left untouched
@@ -0,0 +1,64 @@
+import os
+
+import numpy as np
+import pytest
+
+from src.embedding_quantizer import QuantizedEmbeddingStore
+
+
+def synthetic_embeddings(count=3000, dimension=64, clusters=30, seed=0):
+    """Clustered unit vectors, roughly like embeddings of related document chunks."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dimension))
+    vectors = centers[rng.integers(clusters, size=count)] + 0.5 * rng.standard_normal((count, dimension))
+    queries = vectors[rng.choice(count, 50, replace=False)] + 0.1 * rng.standard_normal((50, dimension))
+    return vectors.astype(np.float32), queries.astype(np.float32)
+
+
+@pytest.mark.parametrize("method, compression, min_recall", [("int8", 4.0, 0.99), ("pq", 16.0, 0.85)])
+def test_reranked_recall_and_compression(method, compression, min_recall):
+    vectors, queries = synthetic_embeddings()
+    store = QuantizedEmbeddingStore(method=method).build(list(range(len(vectors))), vectors)
+    try:
+        report = store.evaluate_recall(queries, k=10)
+    finally:
+        store.close()
+
+    assert report["compression_ratio"] == compression
+    assert report["recall_reranked"] >= min_recall
+    assert report["recall_reranked"] >= report["recall_approx"]
+
+
+def test_build_from_batches_streams_into_a_growing_file():
+    vectors, queries = synthetic_embeddings()
+    batches = [(list(range(start, start + 100)), vectors[start:start + 100]) for start in range(0, len(vectors), 100)]
+    streamed = QuantizedEmbeddingStore().build_from_batches(iter(batches))
+    whole = QuantizedEmbeddingStore().build(list(range(len(vectors))), vectors)
+    try:
+        assert streamed.vectors.shape == (len(vectors), vectors.shape[1])
+        assert os.path.getsize(streamed.vectors.filename) == vectors.size * 4
+        assert streamed.ids == list(range(len(vectors)))
+        assert streamed.search(queries[0], k=5) == whole.search(queries[0], k=5)
+    finally:
+        streamed.close()
+        whole.close()
+
+
+def test_close_removes_temporary_directory_and_rebuild_reuses_it():
+    vectors, _ = synthetic_embeddings(count=500)
+    store = QuantizedEmbeddingStore().build(list(range(len(vectors))), vectors)
+    temp_dir = os.path.dirname(store.vectors.filename)
+    store.build(list(range(100)), vectors[:100])
+    assert os.listdir(temp_dir) == ["vectors.f32"]
+    assert os.path.dirname(store.vectors.filename) == temp_dir
+
+    store.close()
+    assert not os.path.exists(temp_dir)
+    assert store.search(vectors[0]) == []
+
+
+def test_build_without_vectors_fails():
+    store = QuantizedEmbeddingStore()
+    with pytest.raises(ValueError):
+        store.build_from_batches([])
+    store.close()
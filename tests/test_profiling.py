@@ -0,0 +1,57 @@
+import json
+import os
+import threading
+import tracemalloc
+
+from src.profiling import StageProfiler
+
+
+def read_summary(profiler):
+    with open(os.path.join(profiler.run_dir, "summary.json")) as f:
+        return json.load(f)["stages"]
+
+
+def test_concurrent_profiled_stages_share_tracemalloc(tmp_path):
+    barrier = threading.Barrier(2)
+    errors = []
+    profilers = [StageProfiler(output_dir=str(tmp_path / f"run_{i}")) for i in range(2)]
+
+    def stage(finish_first):
+        data = [bytearray(1024) for _ in range(100)]
+        barrier.wait()  # both stages are being traced now
+        if not finish_first:
+            barrier.wait()  # let the other stage finish (and release tracemalloc) first
+        return data
+
+    def run(profiler, finish_first):
+        try:
+            profiler.profile_call("stage", stage, finish_first)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            if finish_first:
+                barrier.wait()
+
+    threads = [threading.Thread(target=run, args=(profiler, i == 0)) for i, profiler in enumerate(profilers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=30)
+
+    assert errors == []
+    for profiler in profilers:
+        (stage_report,) = read_summary(profiler)
+        assert stage_report["concurrent"] is True
+        assert "peak_memory_bytes" not in stage_report
+        assert os.path.exists(stage_report["cpu_profile"])
+    assert not tracemalloc.is_tracing()
+
+
+def test_stage_running_alone_reports_peak(tmp_path):
+    profiler = StageProfiler(output_dir=str(tmp_path))
+    profiler.profile_call("alone", lambda: [bytearray(1024) for _ in range(100)])
+
+    (stage_report,) = read_summary(profiler)
+    assert stage_report["peak_memory_bytes"] > 100 * 1024
+    assert "concurrent" not in stage_report
+    assert not tracemalloc.is_tracing()